@@ -0,0 +1,381 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Benchmarks for the telemetry pipeline. These run entirely on localhost and
+# print a small table of results.
+#
+# Usage: python benchmark.py ingest [--rates 500 2000 5000] [--duration 5]
+#        python benchmark.py decode [--count 20000]
+#        python benchmark.py frames [--baud 57600]
+#        python benchmark.py render [--rate 10]
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import timeit
+from threading import Event, Thread
+
+## LOCAL IMPORTS ##
+from frames import encode_fix_frame, encode_text_frame
+from history import FixHistory
+from ingest import gps_loop, ingest_process
+from packets import GPSFix, PacketDecodeError, decode_packet, decode_packet_fast
+from render import RenderScheduler, tile_position
+from simulate import FlightSimulator
+from telemetry import DEFAULT_MULTICAST_GROUP
+from utils import GPSPoint, crc8
+###################
+
+
+def make_packet(seq: int) -> dict:
+    """A packet shaped like the ones the flight computer sends, with a sequence
+    number."""
+    return {
+        "seq": seq,
+        "time": 1_000 * seq,
+        "state": "ascent",
+        "gps": {
+            "latitude": 32.940058 + seq * 1e-6,
+            "longitude": -106.921903,
+            "altitude": 1400.0 + seq * 0.1,
+        },
+        "baro": {"altitude": 1401.2, "pressure": 85_512.3, "temperature": 24.5},
+        "imu": {"accel": [0.12, -0.03, 9.81], "gyro": [0.001, 0.002, -0.004]},
+        "battery": 7.91,
+    }
+
+
+def make_line(seq: int) -> bytes:
+    """A telemetry line like the flight computer sends."""
+    received_json = json.dumps(make_packet(seq))
+    return f"{crc8(received_json.encode('utf-8'))} {received_json}\n".encode("utf-8")
+
+
+def send_packets(group: str, port: int, rate: float, duration: float, sent):
+    """Send telemetry lines over UDP multicast at a fixed rate. This runs in its
+    own process so that it is not slowed down by the load being measured."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+
+    count = 0
+    start = time.monotonic()
+    while (elapsed := time.monotonic() - start) < duration:
+        # Catch up to where the schedule says we should be
+        while count < elapsed * rate:
+            sock.sendto(make_line(count), (group, port))
+            count += 1
+        time.sleep(0.001)
+
+    sent.value = count
+    sock.close()
+
+
+def gui_load(stop: Event):
+    """Pure Python busy work standing in for Tk redraws and map tile decoding,
+    which hold the GIL on the main thread."""
+    while not stop.is_set():
+        total = 0
+        for i in range(10_000):
+            total += i * i
+
+
+def run_ingest(mode: str, rate: float, duration: float, port: int) -> tuple[int, int]:
+    """Run the ingest loop in `mode` ("thread" or "process") against a stream
+    of `rate` packets per second, with the GUI load running on the main thread.
+    Returns the number of packets sent and received."""
+    context = multiprocessing.get_context("spawn")
+    spec = f"udp://{DEFAULT_MULTICAST_GROUP}:{port}"
+    log_dir = tempfile.TemporaryDirectory()
+    log_path = os.path.join(log_dir.name, "packet_log.txt")
+
+    # The reader prints every packet, which is part of the load but not output
+    # anyone wants to see
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if mode == "process":
+            history = FixHistory.create_shared()
+            event = context.Event()
+            reader = context.Process(
+                target=ingest_process,
+                args=[spec, event, history.memory.name, history.capacity],  # type: ignore
+                kwargs={"log_path": log_path, "quiet": True},
+            )
+        else:
+            history = FixHistory()
+            event = Event()
+            reader = Thread(
+                target=gps_loop, args=[spec, event, history, None, log_path]
+            )
+        reader.start()
+
+        # Give the reader time to start up and join the multicast group
+        time.sleep(2)
+
+        sent = context.Value("q", 0)
+        sender = context.Process(
+            target=send_packets,
+            args=[DEFAULT_MULTICAST_GROUP, port, rate, duration, sent],
+        )
+        sender.start()
+
+        stop = Event()
+        waiter = Thread(target=lambda: (sender.join(), stop.set()))
+        waiter.start()
+        gui_load(stop)
+        waiter.join()
+
+        # Let the reader drain whatever is still buffered
+        time.sleep(0.5)
+        event.set()
+        reader.join()
+
+    received = history.count
+    if mode == "process":
+        history.unlink()
+    log_dir.cleanup()
+
+    return (sent.value, received)  # type: ignore
+
+
+def benchmark_ingest(arguments: argparse.Namespace):
+    print(f"Ingest packet loss with GUI load, {arguments.duration}s per run")
+    print(f"{'mode':>8} {'rate/s':>8} {'sent':>8} {'received':>9} {'loss':>7}")
+
+    port = 5800
+    for rate in arguments.rates:
+        for mode in ("thread", "process"):
+            sent, received = run_ingest(mode, rate, arguments.duration, port)
+            loss = 1 - received / sent if sent > 0 else 0.0
+            print(f"{mode:>8} {rate:>8} {sent:>8} {received:>9} {loss:>7.1%}")
+            port += 1
+
+
+TRICKY_PACKETS = [
+    '{"status":{"gps":null},"gps":{"latitude":1,"longitude":2,"altitude":3}}',
+    '{"gps":{"latitude":1,"longitude":2,"altitude":3},"status":{"gps":null}}',
+    '{"status":{"gps":{"latitude":4,"longitude":5,"altitude":6}}}',
+    '{"radio":{"v":2},"ack":7,"gps":null}',
+    '{"note":"}{","gps":{"latitude":1,"longitude":2,"altitude":3}}',
+    '{"note":"\\"gps\\"","ack":1}',
+    '{"ack":1,"ack":2}',
+    '{"ack":1.5}',
+    '{"mode":"gps"}',
+    '{"radio":{"time":5},"time":1200,"gps":null}',
+    '{"time":-3}',
+    '{"time":1.0e3}',
+    '{"time":"soon"}',
+    '{"ack":3,"ack_seq":12}',
+    '{"ack_seq":12.5,"ack":3}',
+]
+"""Packets that a careless fast decoder would read differently from the full
+decoder"""
+
+
+def check_decoders(lines: list[str]) -> int:
+    """Decode every line with both decoders, printing and counting the ones
+    where they disagree."""
+    mismatches = 0
+    for line in lines:
+        results = []
+        for decoder in (decode_packet, decode_packet_fast):
+            try:
+                packet = decoder(line)
+                results.append(
+                    (
+                        packet.version,
+                        packet.gps,
+                        packet.time_ms,
+                        packet.ack,
+                        packet.ack_seq,
+                    )
+                )
+            except PacketDecodeError as e:
+                results.append(type(e))
+        if results[0] != results[1]:
+            print(f"Decoders disagree on {line}: {results[0]} != {results[1]}")
+            mismatches += 1
+    return mismatches
+
+
+def benchmark_decode(arguments: argparse.Namespace):
+    lines = [json.dumps(make_packet(seq)) for seq in range(arguments.count)]
+
+    mismatches = check_decoders(lines[:100] + TRICKY_PACKETS)
+    print(f"Fast and full decoders disagree on {mismatches} packets")
+
+    def json_only():
+        for line in lines:
+            data = json.loads(line)
+            (data["gps"]["latitude"], data["gps"]["longitude"], data["gps"]["altitude"])
+
+    def full():
+        for line in lines:
+            decode_packet(line)
+
+    def fast():
+        for line in lines:
+            decode_packet_fast(line)
+
+    print(f"Packet decode time, {arguments.count} packets of {len(lines[0])} bytes")
+    print(f"{'decoder':>12} {'µs/packet':>10}")
+    for name, function in (("json.loads", json_only), ("full", full), ("fast", fast)):
+        seconds = min(timeit.repeat(function, number=1, repeat=5))
+        print(f"{name:>12} {seconds / arguments.count * 1e6:>10.2f}")
+
+
+def benchmark_frames(arguments: argparse.Namespace):
+    # 8N1 serial sends 10 bits on the wire for every byte
+    bytes_per_second = arguments.baud / 10
+
+    packet = make_packet(1234)
+    gps = packet["gps"]
+    fix = GPSFix(gps["latitude"], gps["longitude"], gps["altitude"])
+    formats = (
+        ("text, full packet", encode_text_frame(json.dumps(packet))),
+        ("text, fix only", encode_text_frame({"time": packet["time"], "gps": gps})),
+        ("binary fix", encode_fix_frame(fix, packet["time"])),
+    )
+
+    print(f"Bytes per fix and maximum fix rate at {arguments.baud} baud (8N1)")
+    print(f"{'format':>18} {'bytes':>6} {'max fixes/s':>12}")
+    for name, frame in formats:
+        print(f"{name:>18} {len(frame):>6} {bytes_per_second / len(frame):>12.1f}")
+
+
+class CountingWidget:
+    """Stands in for a label or map marker, counting the redraws it causes."""
+
+    def __init__(self, counter: list[int], position=None):
+        self.counter = counter
+        self.position = position
+
+    def configure(self, **kwargs):
+        self.counter[0] += 1
+
+    def draw(self):
+        self.counter[0] += 1
+
+    def set_position(self, latitude: float, longitude: float):
+        self.position = (latitude, longitude)
+        self.counter[0] += 1
+
+
+class StaticMap:
+    """Stands in for the map widget, showing a fixed area around the pad."""
+
+    def __init__(self, center: GPSFix, counter: list[int], zoom: int = 16):
+        self.zoom = zoom
+        self.width = 800
+        self.height = 600
+        self.counter = counter
+
+        # 256 pixel tiles
+        x, y = tile_position(center.latitude, center.longitude, zoom)
+        half_width, half_height = self.width / 512, self.height / 512
+        self.upper_left_tile_pos = (x - half_width, y - half_height)
+        self.lower_right_tile_pos = (x + half_width, y + half_height)
+
+    def set_marker(self, latitude: float, longitude: float):
+        self.counter[0] += 1
+        return CountingWidget(self.counter, (latitude, longitude))
+
+    def set_position(self, latitude: float, longitude: float):
+        self.counter[0] += 1
+
+
+def telemetry_texts(ground: GPSPoint, fix: GPSFix) -> list[str]:
+    """The label texts the GUI shows for a fix, computed the same way."""
+    air = GPSPoint(fix.latitude, fix.longitude, fix.altitude)
+    return [
+        f"{fix.latitude:.8f}",
+        f"{fix.longitude:.8f}",
+        f"{fix.altitude:.2f}m",
+        f"{ground.bearing_mag_corrected_to(air):.1f}°",
+        f"{ground.elevation_to(air):.1f}°",
+        f"{ground.distance_to(air):.1f}",
+        f"{ground.altitude_to(air) or 0.0:.1f}",
+    ]
+
+
+def benchmark_render(arguments: argparse.Namespace):
+    pad = GPSFix(32.940058, -106.921903, 1400.0)
+    ground = GPSPoint(pad.latitude - 0.01, pad.longitude - 0.01, pad.altitude)
+    simulator = FlightSimulator(pad)
+
+    # A minute on the pad, the flight, then a minute after landing
+    fixes = [pad] * round(60 * arguments.rate)
+    while not simulator.landed:
+        simulator.step(1 / arguments.rate)
+        fixes.append(simulator.fix())
+    fixes += [fixes[-1]] * round(60 * arguments.rate)
+
+    # Every fix used to configure every label and move the marker
+    naive = [0]
+    labels = [CountingWidget(naive) for _ in range(7)]
+    marker = CountingWidget(naive)
+    for fix in fixes:
+        for label, text in zip(labels, telemetry_texts(ground, fix)):
+            label.configure(text=text)
+        marker.set_position(fix.latitude, fix.longitude)
+
+    # The GUI flushes once per frame, which is once per fix at 10 Hz
+    batched = [0]
+    map_widget = StaticMap(pad, batched)
+    renderer = RenderScheduler(None, map_widget)
+    labels = [CountingWidget(batched) for _ in range(7)]
+    start = time.perf_counter()
+    for fix in fixes:
+        for label, text in zip(labels, telemetry_texts(ground, fix)):
+            renderer.set_text(label, text)
+        renderer.move_marker(
+            "air", fix.latitude, fix.longitude, create=map_widget.set_marker
+        )
+        renderer.flush()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Tk redraws for a simulated flight, {len(fixes)} fixes at {arguments.rate} Hz"
+    )
+    print(f"{'renderer':>10} {'redraws':>8} {'per fix':>8}")
+    for name, count in (("naive", naive[0]), ("batched", batched[0])):
+        print(f"{name:>10} {count:>8} {count / len(fixes):>8.2f}")
+    print(
+        f"Tk thread time per fix, not counting redraws:"
+        f" {elapsed / len(fixes) * 1e6:.0f}µs"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetry pipeline benchmarks")
+    subparsers = parser.add_subparsers(required=True)
+
+    ingest = subparsers.add_parser(
+        "ingest", help="packet loss of thread versus process ingest"
+    )
+    ingest.add_argument("--rates", type=int, nargs="+", default=[500, 2000, 5000])
+    ingest.add_argument("--duration", type=float, default=5.0)
+    ingest.set_defaults(run=benchmark_ingest)
+
+    decode = subparsers.add_parser("decode", help="time to decode each packet")
+    decode.add_argument("--count", type=int, default=20_000)
+    decode.set_defaults(run=benchmark_decode)
+
+    frames = subparsers.add_parser("frames", help="bytes per fix of each format")
+    frames.add_argument("--baud", type=int, default=57600)
+    frames.set_defaults(run=benchmark_frames)
+
+    render = subparsers.add_parser("render", help="widget redraws per fix")
+    render.add_argument("--rate", type=float, default=10.0)
+    render.set_defaults(run=benchmark_render)
+
+    arguments = parser.parse_args()
+    arguments.run(arguments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Columnar post-flight datasets. `packet_log.txt` stores one `timestamp,json`
+# line per packet, so every analysis used to re-parse every line. This module
+# streams a log once into a directory of flat little-endian float64 arrays, one
+# per (flattened) field plus a `log_time` column, which can then be memory-mapped
+# and sliced by time without touching JSON again. Times are UNIX timestamps,
+# so logs written with UTC timestamps slice correctly across daylight saving
+# changes. Slicing needs times in order, so, the same as `LogIndex`, a line
+# earlier than the one before it (a clock step, or a daylight saving change in
+# an older local time log) is treated as happening at the same time, and the
+# number of such lines is recorded in the manifest.
+#
+# Usage: python flight_data.py <packet log> [output directory]
+
+import datetime
+import json
+import math
+import pathlib
+import re
+import sys
+from typing import Any, Optional, Union
+
+import numpy as np
+
+MANIFEST_NAME = "dataset.json"
+TIME_FIELD = "log_time"
+COLUMN_DTYPE = np.dtype("<f8")
+MAX_COLUMNS = 1024
+"""Limit on the number of fields, each of which is an open file while
+converting"""
+
+
+class FlightDataError(ValueError):
+    """A packet log cannot be converted into a dataset."""
+
+
+def flatten(packet: Any, prefix: str = "", out: Optional[dict] = None) -> dict:
+    """Flatten a decoded packet into `{"gps.latitude": 40.8, ...}`. Only
+    numeric values are kept, booleans become 0/1 and nulls become NaN."""
+    if out is None:
+        out = {}
+
+    if isinstance(packet, dict):
+        for key, value in packet.items():
+            flatten(value, f"{prefix}{key}.", out)
+    elif isinstance(packet, list):
+        for i, value in enumerate(packet):
+            flatten(value, f"{prefix}{i}.", out)
+    elif isinstance(packet, (bool, int, float)):
+        out[prefix[:-1]] = float(packet)
+    elif packet is None and prefix != "":
+        out[prefix[:-1]] = math.nan
+
+    return out
+
+
+def parse_log_line(line: str) -> Optional[tuple[float, Any]]:
+    """Split a `timestamp,json` log line into a UNIX timestamp and the decoded
+    packet, or return `None` if the line is malformed. Timestamps without an
+    offset are taken as local time."""
+    timestamp, sep, received_json = line.partition(",")
+    if sep == "":
+        return None
+
+    try:
+        time = datetime.datetime.fromisoformat(timestamp).timestamp()
+        return (time, json.loads(received_json))
+    except ValueError:
+        return None
+
+
+UNSAFE_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def column_file_name(field: str, taken: set[str]) -> str:
+    """A file name for a field's column that is safe on any filesystem and
+    differs from every name in `taken`, even ignoring case. The name is added
+    to `taken`."""
+    base = UNSAFE_CHARACTERS.sub("_", field)
+    name = base + ".f64"
+    suffix = 2
+    while name.lower() in taken:
+        name = f"{base}~{suffix}.f64"
+        suffix += 1
+    taken.add(name.lower())
+    return name
+
+
+def convert(
+    log_path: Union[str, pathlib.Path],
+    out_dir: Union[str, pathlib.Path],
+    chunk_size: int = 4096,
+) -> "FlightDataset":
+    """Stream a packet log into a columnar dataset directory and return it.
+    Raises `FlightDataError` if a packet has a field named like the time
+    column or there are too many fields."""
+    log_path = pathlib.Path(log_path)
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    columns: dict[str, Any] = {}
+    files: dict[str, str] = {}
+    """File name of every field's column"""
+    taken: set[str] = set()
+    rows = 0
+    skipped = 0
+    clamped = 0
+    chunk_times: list[float] = []
+    chunk_rows: list[dict] = []
+
+    def flush():
+        nonlocal rows
+        if len(chunk_rows) == 0:
+            return
+
+        new_fields = set().union(*chunk_rows) - columns.keys()
+        if len(columns) + len(new_fields) > MAX_COLUMNS:
+            raise FlightDataError(f"more than {MAX_COLUMNS} fields")
+        for field in sorted(new_fields):
+            files[field] = column_file_name(field, taken)
+            columns[field] = open(out_dir / files[field], "wb")
+            # Backfill rows from before this field first appeared
+            np.full(rows, math.nan, dtype=COLUMN_DTYPE).tofile(columns[field])
+
+        np.asarray(chunk_times, dtype=COLUMN_DTYPE).tofile(columns[TIME_FIELD])
+        for field, file in columns.items():
+            if field == TIME_FIELD:
+                continue
+            values = [row.get(field, math.nan) for row in chunk_rows]
+            np.asarray(values, dtype=COLUMN_DTYPE).tofile(file)
+
+        rows += len(chunk_rows)
+        chunk_times.clear()
+        chunk_rows.clear()
+
+    files[TIME_FIELD] = column_file_name(TIME_FIELD, taken)
+    columns[TIME_FIELD] = open(out_dir / files[TIME_FIELD], "wb")
+    try:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as log:
+            last_time = -math.inf
+            for number, line in enumerate(log, 1):
+                parsed = parse_log_line(line.strip())
+                if parsed is None:
+                    skipped += 1
+                    continue
+
+                # Slicing by time needs times in order
+                time, packet = parsed
+                if time < last_time:
+                    time = last_time
+                    clamped += 1
+                last_time = time
+
+                row = flatten(packet)
+                if TIME_FIELD in row:
+                    raise FlightDataError(
+                        f"packet on line {number} has a {TIME_FIELD} field"
+                    )
+
+                chunk_times.append(time)
+                chunk_rows.append(row)
+                if len(chunk_rows) >= chunk_size:
+                    flush()
+            flush()
+    finally:
+        for file in columns.values():
+            file.close()
+
+    manifest = {
+        "source": str(log_path),
+        "rows": rows,
+        "skipped": skipped,
+        "clamped": clamped,
+        "fields": sorted(f for f in columns if f != TIME_FIELD),
+        "files": files,
+    }
+    with open(out_dir / MANIFEST_NAME, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+    return FlightDataset(out_dir)
+
+
+class FlightDataset:
+    """A converted flight log, with every column memory-mapped on demand."""
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path = pathlib.Path(path)
+        with open(self.path / MANIFEST_NAME, "r", encoding="utf-8") as file:
+            self.manifest = json.load(file)
+
+        self.rows: int = self.manifest["rows"]
+        self.fields: list[str] = self.manifest["fields"]
+        self._columns: dict[str, np.ndarray] = {}
+
+        self.time = self.column(TIME_FIELD)
+        """UNIX timestamp of every row"""
+
+    def column(self, field: str) -> np.ndarray:
+        """Memory-map a single column, such as `gps.altitude`."""
+        if field not in self._columns:
+            if field != TIME_FIELD and field not in self.fields:
+                raise KeyError(field)
+            if self.rows == 0:
+                self._columns[field] = np.empty(0, dtype=COLUMN_DTYPE)
+            else:
+                self._columns[field] = np.memmap(
+                    self.path / self.manifest["files"][field],
+                    dtype=COLUMN_DTYPE,
+                    mode="r",
+                    shape=(self.rows,),
+                )
+        return self._columns[field]
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.column(field)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def time_slice(
+        self,
+        start: Union[float, datetime.datetime, None] = None,
+        end: Union[float, datetime.datetime, None] = None,
+    ) -> slice:
+        """The rows with `start <= time < end`, found by binary search over the
+        time column, which `convert` keeps in order. Timestamps may be UNIX times or
+        datetimes."""
+        if isinstance(start, datetime.datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime.datetime):
+            end = end.timestamp()
+
+        lo = 0 if start is None else int(np.searchsorted(self.time, start, "left"))
+        hi = self.rows if end is None else int(np.searchsorted(self.time, end, "left"))
+        return slice(lo, hi)
+
+    def between(
+        self,
+        field: str,
+        start: Union[float, datetime.datetime, None] = None,
+        end: Union[float, datetime.datetime, None] = None,
+    ) -> np.ndarray:
+        """The values of a field between two times, as a memory-mapped view."""
+        return self.column(field)[self.time_slice(start, end)]
+
+
+def main(arguments: list[str]):
+    if len(arguments) < 1:
+        print("Not enough arguments! Need: <packet log> [output directory]")
+        return
+
+    log_path = pathlib.Path(arguments[0])
+    if len(arguments) > 1:
+        out_dir = pathlib.Path(arguments[1])
+    else:
+        out_dir = log_path.with_name(log_path.stem + "_dataset")
+
+    try:
+        dataset = convert(log_path, out_dir)
+    except FlightDataError as e:
+        print(f"Could not convert {log_path}: {e}")
+        return
+    print(
+        f"Wrote {dataset.rows} rows of {len(dataset.fields)} fields to {out_dir}"
+        f" ({dataset.manifest['skipped']} malformed lines skipped,"
+        f" {dataset.manifest['clamped']} lines earlier than the one before)"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
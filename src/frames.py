@@ -0,0 +1,171 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Framing of the RFD link. Two kinds of frames can share the link and are told
+# apart by their first byte:
+#
+#   Text:   <crc> <json>\n
+#           The CRC is the decimal `crc8` of the JSON text.
+#
+#   Binary: 0xA5 <type> <length> <payload…> <crc>
+#           The CRC is the `crc8` of the type, length and payload bytes.
+#
+# A text frame always starts with an ASCII digit, so the 0xA5 sync byte is
+# unambiguous. The binary frames so far are a GPS fix, which fits in 20 bytes
+# instead of the hundred or more a JSON packet needs, and an uplink command
+# acknowledgement. Firmware that supports sequenced uplink also takes commands
+# as binary frames with a sequence number, which its acknowledgements echo.
+
+import json
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+## LOCAL IMPORTS ##
+from packets import STATS, GPSFix, PacketDecodeError, TelemetryPacket
+from telemetry import TelemetrySource
+from utils import crc8
+###################
+
+SYNC = 0xA5
+
+FRAME_TEXT = 0x00
+"""Not a real type byte, used to mark text frames"""
+FRAME_FIX = 0x01
+FRAME_ACK = 0x02
+"""The value of the uplink command being acknowledged, preceded by its
+sequence number with sequenced uplink"""
+FRAME_COMMAND = 0x03
+"""Sequence number and value of an uplink command, for sequenced uplink"""
+
+FIX_RECORD = struct.Struct("<Iiii")
+"""Onboard time in ms, latitude and longitude in 1e-7 degrees, altitude in cm"""
+
+
+class FrameError(ValueError):
+    """A binary frame was truncated or failed its CRC."""
+
+
+@dataclass(slots=True)
+class Frame:
+    kind: int
+    payload: bytes
+    raw: bytes
+    """The complete frame as it was received"""
+    first_byte: float = 0.0
+    end: float = 0.0
+    """Monotonic times the first and last bytes of the frame were read"""
+
+
+def encode_text_frame(packet: Union[dict, str]) -> bytes:
+    """Encode a packet (or already encoded JSON) as a text frame."""
+    if isinstance(packet, dict):
+        packet = json.dumps(packet, separators=(",", ":"))
+    return f"{crc8(packet.encode('utf-8'))} {packet}\n".encode("utf-8")
+
+
+def encode_binary_frame(kind: int, payload: bytes) -> bytes:
+    header = bytes([kind, len(payload)])
+    return bytes([SYNC]) + header + payload + bytes([crc8(header + payload)])
+
+
+def encode_fix_frame(fix: GPSFix, time_ms: int = 0) -> bytes:
+    """Encode a GPS fix as a compact binary frame."""
+    payload = FIX_RECORD.pack(
+        time_ms & 0xFFFFFFFF,
+        round(fix.latitude * 1e7),
+        round(fix.longitude * 1e7),
+        round(fix.altitude * 100),
+    )
+    return encode_binary_frame(FRAME_FIX, payload)
+
+
+def encode_command_frame(command: int, seq: Optional[int] = None) -> bytes:
+    """Encode a single byte uplink command for the flight computer, in the
+    legacy frame unless a sequence number is given."""
+    if seq is None:
+        return bytes([command, crc8(bytes([command])), 0x20])
+    return encode_binary_frame(FRAME_COMMAND, bytes([seq & 0xFF, command]))
+
+
+def decode_binary_frame(frame: Frame) -> TelemetryPacket:
+    """Decode the payload of a binary frame into a packet."""
+    if frame.kind == FRAME_ACK and len(frame.payload) == 1:
+        STATS.decoded += 1
+        return TelemetryPacket(1, ack=frame.payload[0])
+    if frame.kind == FRAME_ACK and len(frame.payload) == 2:
+        STATS.decoded += 1
+        return TelemetryPacket(1, ack=frame.payload[1], ack_seq=frame.payload[0])
+
+    if frame.kind != FRAME_FIX:
+        STATS.error("unknown frame")
+        raise PacketDecodeError(f"unknown frame type {frame.kind}")
+
+    if len(frame.payload) != FIX_RECORD.size:
+        STATS.error("schema")
+        raise PacketDecodeError("invalid fix record length")
+
+    time_ms, latitude, longitude, altitude = FIX_RECORD.unpack(frame.payload)
+    STATS.decoded += 1
+    return TelemetryPacket(
+        1, GPSFix(latitude / 1e7, longitude / 1e7, altitude / 100), time_ms
+    )
+
+
+def packet_to_json(packet: TelemetryPacket) -> str:
+    """Encode a packet as JSON in the same shape the flight computer uses, so
+    that binary frames can be logged alongside text ones."""
+    data: dict = {}
+    if packet.time_ms is not None:
+        data["time"] = packet.time_ms
+    if packet.ack is not None:
+        data["ack"] = packet.ack
+    if packet.ack_seq is not None:
+        data["ack_seq"] = packet.ack_seq
+    if packet.gps is not None:
+        data["gps"] = {
+            "latitude": packet.gps.latitude,
+            "longitude": packet.gps.longitude,
+            "altitude": packet.gps.altitude,
+        }
+    if packet.extra is not None:
+        data.update(packet.extra)
+    return json.dumps(data, separators=(",", ":"))
+
+
+class FrameReader:
+    """Reads text and binary frames from a telemetry source, detecting the
+    kind of each frame from its first byte."""
+
+    def __init__(self, source: TelemetrySource):
+        self.source = source
+
+    def read_frame(self) -> Optional[Frame]:
+        """Read the next frame, or return `None` if nothing arrived within the
+        timeout. Text frames are returned without checking their CRC."""
+        first = self.source.read(1)
+        if len(first) == 0:
+            return None
+        first_byte = time.monotonic()
+
+        if first[0] != SYNC:
+            line = first + self.source.readline()
+            return Frame(FRAME_TEXT, line, line, first_byte, time.monotonic())
+
+        header = self.source.read(2)
+        if len(header) < 2:
+            raise FrameError("truncated header")
+
+        rest = self.source.read(header[1] + 1)
+        if len(rest) < header[1] + 1:
+            raise FrameError("truncated payload")
+
+        payload = rest[:-1]
+        calculated_crc = crc8(header + payload)
+        if calculated_crc != rest[-1]:
+            raise FrameError(f"CRCs do not match ({calculated_crc} != {rest[-1]})")
+
+        return Frame(
+            header[0], payload, first + header + rest, first_byte, time.monotonic()
+        )
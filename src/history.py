@@ -0,0 +1,154 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Fixed size ring buffers of telemetry samples. There is a single writer (the
+# telemetry reader) and any number of readers, which keep track of the
+# sequence number they have read up to and never need a lock: a reader copies
+# the rows it wants, then drops any that the writer overwrote while it was
+# copying. The slot the writer fills next is never handed out, so a row can
+# not be torn either.
+#
+# A buffer can live in `multiprocessing.shared_memory`, in which case another
+# process can attach to it by name and read rows straight out of the shared
+# pages, without any pickling.
+
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+HEADER_SIZE = 8
+
+
+class RingBuffer:
+    """A fixed size ring buffer of float64 rows with named columns."""
+
+    def __init__(
+        self,
+        fields: tuple[str, ...],
+        capacity: int = 8192,
+        memory: Optional[shared_memory.SharedMemory] = None,
+    ):
+        self.fields = fields
+        self.capacity = capacity
+        self.memory = memory
+        """The shared memory block backing this buffer, if any"""
+
+        if memory is None:
+            self._count = np.zeros(1, dtype=np.uint64)
+            self._data = np.full((capacity, len(fields)), np.nan, dtype=np.float64)
+        else:
+            self._count = np.ndarray((1,), dtype=np.uint64, buffer=memory.buf)
+            self._data = np.ndarray(
+                (capacity, len(fields)),
+                dtype=np.float64,
+                buffer=memory.buf,
+                offset=HEADER_SIZE,
+            )
+
+    @staticmethod
+    def shared_size(fields: tuple[str, ...], capacity: int) -> int:
+        """Size in bytes of the shared memory block needed for a buffer."""
+        return HEADER_SIZE + capacity * len(fields) * 8
+
+    def close(self):
+        """Detach from the shared memory block, if there is one."""
+        if self.memory is not None:
+            del self._count, self._data
+            self.memory.close()
+            self.memory = None
+
+    def unlink(self):
+        """Detach from and free the shared memory block, if there is one. Only
+        the process that created the block should do this."""
+        if self.memory is not None:
+            memory = self.memory
+            self.close()
+            memory.unlink()
+
+    def column(self, field: str) -> int:
+        """Index of a named column in the rows returned by this buffer."""
+        return self.fields.index(field)
+
+    @property
+    def count(self) -> int:
+        """Total number of rows ever appended, which is also the sequence
+        number of the next row."""
+        return int(self._count[0])
+
+    def append(self, *values: float):
+        count = self.count
+        self._data[count % self.capacity] = values
+        # Only publish the row once it has been completely written
+        self._count[0] = count + 1
+
+    def extend(self, rows: np.ndarray):
+        """Append many rows at once."""
+        end = self.count + len(rows)
+        rows = rows[-self.capacity :]
+        self._data[np.arange(end - len(rows), end) % self.capacity] = rows
+        self._count[0] = end
+
+    def clear(self):
+        self._count[0] = 0
+
+    def since(self, seq: int) -> tuple[np.ndarray, int]:
+        """Copy every row from sequence number `seq` onward that is still in the
+        buffer. Returns the rows and the sequence number to read from next."""
+        # The slot after the newest row may be half written, so leave it alone
+        usable = self.capacity - 1
+
+        end = self.count
+        start = max(seq, end - usable)
+        if start >= end:
+            return (np.empty((0, len(self.fields))), end)
+
+        rows = self._data[np.arange(start, end) % self.capacity]
+
+        # Drop rows the writer has lapped while they were being copied
+        oldest = self.count - usable
+        if oldest > start:
+            rows = rows[oldest - start :]
+
+        return (rows, end)
+
+    def last(self, n: int) -> np.ndarray:
+        """Copy the most recent `n` rows, oldest first."""
+        return self.since(self.count - n)[0]
+
+    def latest(self) -> Optional[np.ndarray]:
+        """Copy the most recent row, if there is one."""
+        rows = self.last(1)
+        return rows[0] if len(rows) > 0 else None
+
+
+FIX_FIELDS = ("time", "latitude", "longitude", "altitude")
+
+
+class FixHistory(RingBuffer):
+    """Recent GPS fixes from the rocket, stamped with the UNIX time they
+    arrived at."""
+
+    def __init__(
+        self,
+        capacity: int = 8192,
+        memory: Optional[shared_memory.SharedMemory] = None,
+    ):
+        super().__init__(FIX_FIELDS, capacity, memory)
+
+    @classmethod
+    def create_shared(cls, capacity: int = 8192) -> "FixHistory":
+        """Create a fix history in a new shared memory block."""
+        memory = shared_memory.SharedMemory(
+            create=True, size=cls.shared_size(FIX_FIELDS, capacity)
+        )
+        history = cls(capacity, memory)
+        history.clear()
+        return history
+
+    @classmethod
+    def attach(cls, name: str, capacity: int = 8192) -> "FixHistory":
+        """Attach to a fix history created by another process."""
+        # Only the creating process is responsible for unlinking the block
+        memory = shared_memory.SharedMemory(name=name, track=False)
+        return cls(capacity, memory)
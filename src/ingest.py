@@ -0,0 +1,254 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Telemetry ingest: reading frames from the RFD (or another source), checking
+# their CRC, decoding them and logging them. This runs either on a thread in the
+# GUI process, or in a separate process writing fixes into a shared memory
+# `FixHistory`, so that it never has to compete with Tk for the GIL. This module
+# deliberately does not import anything GUI related, so that the benchmarks and
+# other tools can drive it without a display.
+
+import contextlib
+import datetime
+import json
+import os
+import time
+from threading import Event
+from typing import Optional
+
+## LOCAL IMPORTS ##
+from frames import (
+    FRAME_TEXT,
+    FrameError,
+    FrameReader,
+    decode_binary_frame,
+    packet_to_json,
+)
+from history import FixHistory
+from link_stats import LinkStats, monotonic_to_unix
+from packets import STATS, PacketDecodeError, TelemetryPacket, decode_packet_fast
+from telemetry import open_source
+from telemetry_server import TelemetryServer
+from uplink import DEFAULT_UPLINK_PORT, Uplink, UplinkServer
+from utils import crc8
+###################
+
+ROCKET_PACKET_CONT: Optional[TelemetryPacket] = None
+"""Global variable storing the latest rocket packet data"""
+
+PACKET_LOG_PATH = "packet_log.txt"
+LINK_LOG_PATH = "link_log.txt"
+LINK_LOG_INTERVAL = 10.0
+
+
+def verify_text_frame(line: bytes) -> Optional[str]:
+    """Check the CRC of a text frame, returning the JSON text if it matches."""
+    try:
+        new_data = line.decode("utf-8").strip()
+    except Exception as e:
+        print(f"Failed to read telemetry: {e}")
+        return None
+
+    if len(new_data) == 0:
+        return None
+
+    try:
+        received_crc, received_json = new_data.split(maxsplit=1)
+        received_crc = int(received_crc)
+    except Exception as e:
+        print(f"Splitting failed: {e}")
+        return None
+
+    # Calculate CRC from the data
+    calculated_crc = None
+    try:
+        calculated_crc = crc8(received_json.encode("utf-8"))
+    except Exception as e:
+        print(f"Could not calculate new CRC: {e}")
+        return None
+
+    # Compare CRCs if they exist and work
+    if calculated_crc != received_crc:
+        print(f"CRCs do not match ({calculated_crc} != {received_crc})")
+        return None
+    else:
+        print(f"CRCs match ({calculated_crc} == {received_crc})")
+
+    return received_json
+
+
+def gps_loop(
+    gps_port: str,
+    event: Event,
+    history: FixHistory,
+    server: Optional[TelemetryServer] = None,
+    log_path: str = PACKET_LOG_PATH,
+    uplink: Optional[Uplink] = None,
+    stats: Optional[LinkStats] = None,
+):
+    try:
+        gps_source = open_source(gps_port)
+    except IOError as e:
+        print(f"Failed to start GPS loop: {e}")
+        return
+
+    print(f"Started GPS loop on {gps_source.name}")
+
+    # Uplink commands share the port with the reader instead of opening it again
+    if uplink is not None:
+        uplink.attach(gps_source)
+
+    reader = FrameReader(gps_source)
+    if stats is None:
+        stats = LinkStats()
+    link_log_path = os.path.join(os.path.dirname(log_path), LINK_LOG_PATH)
+    last_link_log = time.monotonic()
+
+    # Ignoring the errors in this is OK because it must not crash!
+    while not event.is_set():
+        if time.monotonic() - last_link_log >= LINK_LOG_INTERVAL:
+            last_link_log = time.monotonic()
+            write_log(link_log_path, json.dumps(stats.summary()))
+
+        try:
+            frame = reader.read_frame()
+        except FrameError as e:
+            print(f"Invalid binary frame: {e}")
+            stats.bad_frame()
+            continue
+        except Exception as e:
+            print(f"Failed to read telemetry: {e}")
+            continue
+
+        if frame is None:
+            continue
+
+        # Only decode the fields the tracker needs, errors are counted in STATS
+        try:
+            if frame.kind == FRAME_TEXT:
+                received_json = verify_text_frame(frame.payload)
+                if received_json is None:
+                    stats.bad_frame()
+                    continue
+                packet = decode_packet_fast(received_json)
+            else:
+                packet = decode_binary_frame(frame)
+                received_json = packet_to_json(packet)
+        except PacketDecodeError:
+            continue
+
+        # Share the verified frame with any other viewers
+        if server is not None:
+            server.publish(frame.raw)
+
+        if uplink is not None and packet.ack is not None:
+            uplink.acknowledge(packet.ack, packet.ack_seq)
+
+        global ROCKET_PACKET_CONT
+        ROCKET_PACKET_CONT = packet
+
+        # Fixes are stamped with when they arrived, not when they were decoded
+        if packet.gps is not None:
+            history.append(
+                monotonic_to_unix(frame.first_byte),
+                packet.gps.latitude,
+                packet.gps.longitude,
+                packet.gps.altitude,
+            )
+
+        stats.frame_received(
+            frame.first_byte, frame.end, packet.time_ms, time.monotonic()
+        )
+
+        write_log(log_path, received_json)
+
+    write_log(link_log_path, json.dumps(stats.summary()))
+
+    # Close the serial port
+    if uplink is not None:
+        uplink.detach(gps_source)
+    gps_source.close()
+
+    print(
+        f"Stopped GPS loop: {STATS.decoded} packets decoded,"
+        f" {STATS.error_count()} invalid {STATS.errors}"
+    )
+
+
+def write_log(log_path: str, line: str):
+    """Append a `timestamp,json` line to a log. Timestamps are UTC with an
+    explicit offset, so they never jump at daylight saving changes."""
+    try:
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        with open(log_path, "a") as log:
+            log.write(timestamp)
+            log.write(",")
+            log.write(line)
+            log.write("\n")
+    except Exception as e:
+        print(f"Saving to txt failed: {e}")
+
+
+def ingest_process(
+    gps_port: str,
+    event: Event,
+    history_name: str,
+    history_capacity: int,
+    serve: Optional[tuple[str, int]] = None,
+    multicast: Optional[tuple[str, int]] = None,
+    log_path: str = PACKET_LOG_PATH,
+    quiet: bool = False,
+    stats_name: Optional[str] = None,
+    sequenced_uplink: bool = False,
+):
+    """Entry point of the ingest process. Fixes are written into the shared
+    memory `FixHistory` named `history_name`, and link statistics into the
+    shared `LinkStats` named `stats_name`, which the GUI process reads."""
+    history = FixHistory.attach(history_name, history_capacity)
+    stats = LinkStats.attach(stats_name) if stats_name is not None else LinkStats()
+
+    server = None
+    if serve is not None:
+        try:
+            server = TelemetryServer(*serve, multicast=multicast)
+            server.start()
+        except OSError as e:
+            print(f"Failed to start telemetry server: {e}")
+
+    uplink = Uplink(sequenced=sequenced_uplink)
+    uplink.start()
+    uplink_server = start_uplink_server(uplink)
+
+    try:
+        if quiet:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                gps_loop(gps_port, event, history, server, log_path, uplink, stats)
+        else:
+            gps_loop(gps_port, event, history, server, log_path, uplink, stats)
+    finally:
+        if server is not None:
+            server.close()
+        if uplink_server is not None:
+            uplink_server.close()
+        uplink.stop()
+        history.close()
+        stats.close()
+
+
+def start_uplink_server(
+    uplink: Uplink, port: int = DEFAULT_UPLINK_PORT, attempts: int = 5
+) -> Optional[UplinkServer]:
+    """Start accepting local uplink commands. A reader that was just stopped
+    may still be holding the port for a moment, so binding is retried."""
+    for attempt in range(attempts):
+        try:
+            server = UplinkServer(uplink, port=port)
+            server.start()
+            return server
+        except OSError as e:
+            if attempt == attempts - 1:
+                print(f"Failed to start uplink server: {e}")
+            else:
+                time.sleep(0.5)
+    return None
@@ -0,0 +1,247 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Landing zone prediction during descent. The descent rate and the wind drift
+# are fitted to the last few seconds of fixes, then thousands of descents are
+# simulated at once with NumPy, each with its own descent rate and a wind that
+# wanders randomly with altitude. The spread of the simulated landing points
+# gives the predicted landing ellipse. Prediction runs on its own thread, and
+# only ever reads new fixes from the history.
+
+import math
+import time
+from dataclasses import dataclass
+from threading import Event, Thread
+from typing import Optional
+
+import numpy as np
+
+## LOCAL IMPORTS ##
+from history import FixHistory
+from utils import EARTH_RADIUS_METERS
+###################
+
+CHI2_95 = 5.991
+"""95% quantile of the chi-squared distribution with two degrees of freedom,
+which scales a 1σ ellipse to one containing 95% of landings"""
+
+
+@dataclass(slots=True)
+class DescentEstimate:
+    latitude: float
+    longitude: float
+    altitude: float
+    descent_rate: float
+    """Positive while descending, in m/s"""
+    descent_rate_std: float
+    wind_east: float
+    wind_north: float
+    """Horizontal drift velocity in m/s"""
+    wind_std: float
+
+
+@dataclass(slots=True)
+class LandingPrediction:
+    latitude: float
+    longitude: float
+    """Centroid of the simulated landing points"""
+    ellipse: list[tuple[float, float]]
+    """Outline of the 95% landing ellipse as (latitude, longitude) points"""
+    time_to_landing: float
+    samples: int
+    elapsed: float
+    """Seconds the simulation took"""
+
+
+def to_local(fixes: np.ndarray, latitude: float, longitude: float) -> np.ndarray:
+    """Convert (latitude, longitude) columns to meters east and north of a
+    point. An equirectangular projection is plenty for a few kilometers."""
+    east = np.radians(fixes[:, 0] - longitude) * math.cos(math.radians(latitude))
+    north = np.radians(fixes[:, 1] - latitude)
+    return np.column_stack((east, north)) * EARTH_RADIUS_METERS
+
+
+def from_local(
+    points: np.ndarray, latitude: float, longitude: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Inverse of `to_local`, returning latitudes and longitudes."""
+    lats = latitude + np.degrees(points[..., 1] / EARTH_RADIUS_METERS)
+    lons = longitude + np.degrees(
+        points[..., 0] / (EARTH_RADIUS_METERS * math.cos(math.radians(latitude)))
+    )
+    return (lats, lons)
+
+
+def estimate_descent(
+    fixes: np.ndarray, min_fixes: int = 5, min_rate: float = 1.0
+) -> Optional[DescentEstimate]:
+    """Fit constant drift and descent velocities to rows of (time, latitude,
+    longitude, altitude) fixes. Returns `None` unless the rocket is clearly
+    descending."""
+    if len(fixes) < min_fixes:
+        return None
+
+    times = fixes[:, 0] - fixes[-1, 0]
+    latitude, longitude, altitude = fixes[-1, 1:]
+    local = to_local(fixes[:, [2, 1]], latitude, longitude)
+
+    # Least squares lines through east, north and altitude against time
+    design = np.column_stack((times, np.ones_like(times)))
+    targets = np.column_stack((local, fixes[:, 3]))
+    coefficients, _, _, _ = np.linalg.lstsq(design, targets, rcond=None)
+    residuals = targets - design @ coefficients
+
+    # Standard error of each slope
+    dof = max(len(times) - 2, 1)
+    spread = np.sum((times - times.mean()) ** 2)
+    if spread <= 0:
+        return None
+    slope_std = np.sqrt(np.sum(residuals**2, axis=0) / dof / spread)
+
+    wind_east, wind_north, vertical = coefficients[0]
+    if -vertical < min_rate:
+        return None
+
+    return DescentEstimate(
+        latitude,
+        longitude,
+        altitude,
+        -vertical,
+        slope_std[2],
+        wind_east,
+        wind_north,
+        math.hypot(slope_std[0], slope_std[1]),
+    )
+
+
+def simulate_landing(
+    estimate: DescentEstimate,
+    ground_altitude: float,
+    samples: int = 5000,
+    layer_height: float = 50.0,
+    rate_spread: float = 0.1,
+    gust: float = 1.0,
+    shear: float = 0.5,
+    rng: Optional[np.random.Generator] = None,
+) -> Optional[LandingPrediction]:
+    """Monte Carlo the rest of the descent from `estimate`. The descent is
+    split into layers of `layer_height`, and every simulated descent keeps its
+    own descent rate (varied by `rate_spread` of the estimate on top of its
+    uncertainty) while its wind changes by `shear` m/s between layers around
+    an initial gust of `gust` m/s."""
+    start = time.perf_counter()
+    rng = rng if rng is not None else np.random.default_rng()
+
+    height = estimate.altitude - ground_altitude
+    if height <= 0:
+        return None
+    layers = max(math.ceil(height / layer_height), 1)
+    thickness = height / layers
+
+    rate_std = math.hypot(estimate.descent_rate_std, rate_spread * estimate.descent_rate)
+    rates = rng.normal(estimate.descent_rate, rate_std, samples)
+    rates = np.maximum(rates, 0.2 * estimate.descent_rate)
+    layer_times = thickness / rates
+
+    # Wind in every layer of every descent, wandering with altitude
+    wind_std = math.hypot(estimate.wind_std, gust)
+    initial = rng.normal(
+        (estimate.wind_east, estimate.wind_north), wind_std, (samples, 1, 2)
+    )
+    wind = initial + np.cumsum(rng.normal(0.0, shear, (samples, layers, 2)), axis=1)
+    drift = np.sum(wind, axis=1) * layer_times[:, None]
+
+    centroid = drift.mean(axis=0)
+    covariance = np.cov(drift, rowvar=False)
+    ellipse = ellipse_outline(centroid, covariance)
+
+    lat, lon = from_local(centroid, estimate.latitude, estimate.longitude)
+    lats, lons = from_local(ellipse, estimate.latitude, estimate.longitude)
+    return LandingPrediction(
+        float(lat),
+        float(lon),
+        list(zip(lats.tolist(), lons.tolist())),
+        float(np.mean(layer_times) * layers),
+        samples,
+        time.perf_counter() - start,
+    )
+
+
+def ellipse_outline(
+    centroid: np.ndarray, covariance: np.ndarray, points: int = 36
+) -> np.ndarray:
+    """Points around the 95% ellipse of a 2D normal distribution."""
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    radii = np.sqrt(np.maximum(eigenvalues, 0.0) * CHI2_95)
+    angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    circle = np.column_stack((np.cos(angles), np.sin(angles))) * radii
+    return centroid + circle @ eigenvectors.T
+
+
+class LandingPredictor:
+    """Predicts the landing zone from the fix history on a background thread,
+    whenever new fixes have arrived."""
+
+    def __init__(
+        self,
+        history: FixHistory,
+        window: float = 10.0,
+        interval: float = 1.0,
+        samples: int = 5000,
+    ):
+        self.history = history
+        self.window = window
+        """Seconds of fixes the descent estimate is fitted to"""
+        self.interval = interval
+        self.samples = samples
+
+        self.ground_altitude = 0.0
+        """Altitude of the terrain the rocket will land on"""
+        self.prediction: Optional[LandingPrediction] = None
+        self.generation = 0
+        """Incremented every time `prediction` changes"""
+
+        self.seq = 0
+        self.fixes = np.empty((0, len(history.fields)))
+        self.reset_requested = False
+        self.stop_event = Event()
+        self.thread = Thread(target=self.run, name="landing_predictor", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def reset(self):
+        """Start over from the beginning of the history, after it was cleared."""
+        self.reset_requested = True
+
+    def update(self):
+        if self.reset_requested:
+            self.reset_requested = False
+            self.seq = 0
+            self.fixes = self.fixes[:0]
+
+        # Keep a window of recent fixes, only copying the new ones
+        new, self.seq = self.history.since(self.seq)
+        if len(new) == 0:
+            return
+        fixes = np.concatenate((self.fixes, new))
+        self.fixes = fixes[fixes[:, 0] >= fixes[-1, 0] - self.window]
+
+        prediction = None
+        estimate = estimate_descent(self.fixes)
+        if estimate is not None:
+            prediction = simulate_landing(estimate, self.ground_altitude, self.samples)
+
+        if prediction is not None or self.prediction is not None:
+            self.prediction = prediction
+            self.generation += 1
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.update()
+            except Exception as e:
+                print(f"Landing prediction failed: {e!r}")
@@ -0,0 +1,212 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Timing and quality of the telemetry link. Every frame is stamped with the
+# monotonic time its first byte arrived and the time its last byte arrived,
+# which tells time on the air apart from time spent decoding. Where packets
+# carry the flight computer's own timestamp, the offset and drift of its clock
+# against ours are estimated from the fastest packets, and the jitter is the
+# variation in transit time (as in RFC 3550). Without onboard timestamps the
+# jitter falls back to the variation in arrival intervals.
+#
+# Everything shown to the user lives in one fixed size float64 array, which can
+# be backed by shared memory the same way a `FixHistory` is, so the GUI can
+# read the statistics of an ingest process.
+
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+SCALARS = (
+    "frames",
+    "bad_frames",
+    "gaps",
+    "interval",
+    "jitter",
+    "airtime",
+    "processing",
+    "offset",
+    "drift_ppm",
+    "latency",
+)
+"""Running totals and averages, times in seconds"""
+
+HISTOGRAMS = {
+    "jitter_ms": (0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+    "gap_s": (0, 1, 2, 5, 10, 30, 60, 120),
+    "bad_burst": (1, 2, 3, 4, 5, 10, 20, 50),
+}
+"""Lower edges of the bins of each histogram, the last bin is open ended"""
+
+CLOCK_WINDOW = 256
+"""Number of (onboard, arrival) time pairs the clock estimate is fitted to"""
+
+
+def layout() -> tuple[dict[str, int], dict[str, slice], int]:
+    """Offsets of the scalars and histograms in the statistics array."""
+    scalars = {name: i for i, name in enumerate(SCALARS)}
+    histograms = {}
+    offset = len(SCALARS)
+    for name, edges in HISTOGRAMS.items():
+        histograms[name] = slice(offset, offset + len(edges))
+        offset += len(edges)
+    return (scalars, histograms, offset)
+
+
+SCALAR_INDEX, HISTOGRAM_SLICES, STATS_SIZE = layout()
+
+
+class LinkStats:
+    """Link statistics kept by the telemetry reader, the only writer."""
+
+    def __init__(self, memory: Optional[shared_memory.SharedMemory] = None):
+        self.memory = memory
+        if memory is None:
+            self._data = np.zeros(STATS_SIZE, dtype=np.float64)
+        else:
+            self._data = np.ndarray((STATS_SIZE,), dtype=np.float64, buffer=memory.buf)
+
+        # State only the writer needs
+        self.last_arrival: Optional[float] = None
+        self.last_onboard: Optional[float] = None
+        self.burst = 0
+        self.clock = np.zeros((CLOCK_WINDOW, 2))
+        """Ring of (onboard, arrival) times in seconds"""
+        self.clock_count = 0
+
+    @classmethod
+    def create_shared(cls) -> "LinkStats":
+        memory = shared_memory.SharedMemory(create=True, size=STATS_SIZE * 8)
+        stats = cls(memory)
+        stats._data[:] = 0
+        return stats
+
+    @classmethod
+    def attach(cls, name: str) -> "LinkStats":
+        # Only the creating process is responsible for unlinking the block
+        return cls(shared_memory.SharedMemory(name=name, track=False))
+
+    def close(self):
+        if self.memory is not None:
+            del self._data
+            self.memory.close()
+            self.memory = None
+
+    def unlink(self):
+        if self.memory is not None:
+            memory = self.memory
+            self.close()
+            memory.unlink()
+
+    def __getitem__(self, name: str) -> float:
+        return float(self._data[SCALAR_INDEX[name]])
+
+    def __setitem__(self, name: str, value: float):
+        self._data[SCALAR_INDEX[name]] = value
+
+    def histogram(self, name: str) -> np.ndarray:
+        """A copy of the counts in each bin of a histogram."""
+        return self._data[HISTOGRAM_SLICES[name]].copy()
+
+    def add_to_histogram(self, name: str, value: float):
+        edges = HISTOGRAMS[name]
+        index = max(int(np.searchsorted(edges, value, side="right")) - 1, 0)
+        self._data[HISTOGRAM_SLICES[name].start + index] += 1
+
+    def percentile(self, name: str, q: float) -> float:
+        """Approximate percentile of a histogram, as the lower edge of the bin
+        it falls in."""
+        counts = self.histogram(name)
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(counts), q / 100 * total))
+        return HISTOGRAMS[name][min(index, len(counts) - 1)]
+
+    def bad_frame(self):
+        """Count a frame that failed its CRC or could not be read."""
+        self["bad_frames"] += 1
+        self.burst += 1
+
+    def frame_received(
+        self,
+        first_byte: float,
+        end: float,
+        onboard_ms: Optional[int] = None,
+        processed: Optional[float] = None,
+    ):
+        """Record a good frame, with the monotonic times its first and last
+        bytes arrived and it finished processing, and its onboard time."""
+        self["frames"] += 1
+        self["airtime"] += (end - first_byte - self["airtime"]) / 16
+        if processed is not None:
+            self["processing"] += (processed - end - self["processing"]) / 16
+
+        if self.burst > 0:
+            self.add_to_histogram("bad_burst", self.burst)
+            self.burst = 0
+
+        onboard = onboard_ms / 1000 if onboard_ms is not None else None
+        if self.last_onboard is not None and onboard is not None:
+            if onboard < self.last_onboard:
+                # The flight computer restarted, so its clock did too
+                self.clock_count = 0
+                self.last_onboard = None
+
+        if self.last_arrival is not None:
+            interval = first_byte - self.last_arrival
+            if self["interval"] == 0:
+                self["interval"] = interval
+
+            # Variation in transit time, or in the interval if there is no
+            # onboard time to compare against
+            if onboard is not None and self.last_onboard is not None:
+                variation = interval - (onboard - self.last_onboard)
+            else:
+                variation = interval - self["interval"]
+            self["jitter"] += (abs(variation) - self["jitter"]) / 16
+            self.add_to_histogram("jitter_ms", abs(variation) * 1000)
+
+            if interval > max(3 * self["interval"], 0.5):
+                self["gaps"] += 1
+                self.add_to_histogram("gap_s", interval)
+            else:
+                self["interval"] += (interval - self["interval"]) / 16
+
+        self.last_arrival = first_byte
+        if onboard is not None:
+            self.last_onboard = onboard
+            self.add_clock_sample(onboard, first_byte)
+
+    def add_clock_sample(self, onboard: float, arrival: float):
+        self.clock[self.clock_count % CLOCK_WINDOW] = (onboard, arrival)
+        self.clock_count += 1
+
+        samples = self.clock[: min(self.clock_count, CLOCK_WINDOW)]
+        if len(samples) >= 8 and self.clock_count % 8 == 0:
+            # Arrival = offset + (1 + drift) * onboard + transit time. Transit
+            # time only ever adds delay, so the fit is anchored to the fastest
+            # packet rather than the average one.
+            onboard_times = samples[:, 0] - samples[0, 0]
+            slope = np.polyfit(onboard_times, samples[:, 1], 1)[0]
+            if slope > 0:
+                self["drift_ppm"] = (slope - 1) * 1e6
+                self["offset"] = float(np.min(samples[:, 1] - slope * samples[:, 0]))
+
+        if self.clock_count >= 8:
+            expected = self["offset"] + (1 + self["drift_ppm"] / 1e6) * onboard
+            self["latency"] = arrival - expected
+
+    def summary(self) -> dict:
+        """Every statistic, for logging."""
+        summary: dict = {name: self[name] for name in SCALARS}
+        for name in HISTOGRAMS:
+            summary[name] = self.histogram(name).astype(int).tolist()
+        return summary
+
+
+def monotonic_to_unix(monotonic: float) -> float:
+    """Convert a `time.monotonic()` stamp from the recent past to UNIX time."""
+    return time.time() - (time.monotonic() - monotonic)
@@ -0,0 +1,252 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# A sidecar index for seeking in packet logs by time. `packet_log.txt.idx`
+# stores the timestamp and byte offset of every `stride`th line of the log, as
+# a memory-mapped array of (time, offset) records after a 40 byte header, so
+# finding any moment is a binary search plus reading at most `stride` lines.
+# The index remembers how much of the log it has covered and only reads what
+# was appended since, so it can be kept up to date while the log grows. A CRC
+# of the start of the log tells a grown log apart from a replaced one.
+#
+# Binary search needs times that never go backwards. Logs are written in UTC,
+# but older logs in local time jump back at daylight saving changes, so a line
+# earlier than the one before it is treated as happening at the same time.
+#
+# Usage: python log_index.py <packet log> [stride]
+
+import datetime
+import os
+import pathlib
+import struct
+import sys
+import zlib
+from typing import Iterator, Union
+
+import numpy as np
+
+## LOCAL IMPORTS ##
+from packets import PacketDecodeError, decode_packet_fast
+###################
+
+INDEX_MAGIC = b"TLI2"
+INDEX_HEADER = struct.Struct("<4sIQQdQ")
+"""Magic, stride, bytes of the log indexed, lines indexed, time of the last
+line, fingerprint of the log"""
+INDEX_DTYPE = np.dtype([("time", "<f8"), ("offset", "<u8")])
+FINGERPRINT_BYTES = 4096
+"""Length of the start of the log the fingerprint is the CRC of"""
+
+
+def parse_log_time(line: bytes) -> float:
+    """The UNIX timestamp of a `timestamp,json` log line, without touching
+    the JSON. Timestamps without an offset are taken as local time. Raises
+    `ValueError` if the line is malformed."""
+    end = line.find(b",")
+    if end == -1:
+        raise ValueError("no timestamp")
+    return datetime.datetime.fromisoformat(line[:end].decode("ascii")).timestamp()
+
+
+class LogIndex:
+    """A time index of a packet log, created or brought up to date when it is
+    opened."""
+
+    def __init__(self, log_path: Union[str, pathlib.Path], stride: int = 256):
+        self.log_path = pathlib.Path(log_path)
+        self.path = self.log_path.with_name(self.log_path.name + ".idx")
+        self.stride = stride
+
+        self.indexed_bytes = 0
+        self.lines = 0
+        self.last_time = float("nan")
+        self.fingerprint = 0
+        self.entries = np.empty(0, dtype=INDEX_DTYPE)
+
+        if not self.load():
+            with open(self.path, "wb") as file:
+                file.write(self.header())
+        self.update()
+
+    def header(self) -> bytes:
+        return INDEX_HEADER.pack(
+            INDEX_MAGIC,
+            self.stride,
+            self.indexed_bytes,
+            self.lines,
+            self.last_time,
+            self.fingerprint,
+        )
+
+    def log_fingerprint(self, length: int) -> int:
+        """CRC of the first `length` bytes of the log, at most
+        `FINGERPRINT_BYTES`."""
+        with open(self.log_path, "rb") as log:
+            return zlib.crc32(log.read(min(length, FINGERPRINT_BYTES)))
+
+    def load(self) -> bool:
+        """Open an existing index, returning `False` if it has to be rebuilt."""
+        try:
+            with open(self.path, "rb") as file:
+                magic, stride, indexed_bytes, lines, last_time, fingerprint = (
+                    INDEX_HEADER.unpack(file.read(INDEX_HEADER.size))
+                )
+            # A log that shrank or starts differently was replaced, so the
+            # offsets mean nothing
+            if (
+                magic != INDEX_MAGIC
+                or stride != self.stride
+                or indexed_bytes > os.path.getsize(self.log_path)
+                or fingerprint != self.log_fingerprint(indexed_bytes)
+            ):
+                return False
+        except (OSError, struct.error):
+            return False
+
+        self.indexed_bytes = indexed_bytes
+        self.lines = lines
+        self.last_time = last_time
+        self.fingerprint = fingerprint
+        self.map_entries()
+        return True
+
+    def map_entries(self):
+        count = (self.lines + self.stride - 1) // self.stride
+        if count == 0:
+            self.entries = np.empty(0, dtype=INDEX_DTYPE)
+        else:
+            self.entries = np.memmap(
+                self.path,
+                dtype=INDEX_DTYPE,
+                mode="r",
+                offset=INDEX_HEADER.size,
+                shape=(count,),
+            )
+
+    def update(self) -> int:
+        """Index any complete lines appended to the log since the last update.
+        Returns the number of new lines."""
+        new_entries = []
+        offset = self.indexed_bytes
+        lines = self.lines
+        last_time = self.last_time
+
+        with open(self.log_path, "rb") as log:
+            log.seek(offset)
+            for line in log:
+                # A partial line is still being written
+                if not line.endswith(b"\n"):
+                    break
+
+                try:
+                    time = parse_log_time(line)
+                except ValueError:
+                    offset += len(line)
+                    continue
+
+                # Never before the line before, comparing with the NaN before
+                # the first line is always false
+                if time < last_time:
+                    time = last_time
+                if lines % self.stride == 0:
+                    new_entries.append((time, offset))
+                lines += 1
+                last_time = time
+                offset += len(line)
+
+        if offset == self.indexed_bytes:
+            return 0
+
+        if self.indexed_bytes < FINGERPRINT_BYTES:
+            self.fingerprint = self.log_fingerprint(offset)
+        new_lines = lines - self.lines
+        self.indexed_bytes = offset
+        self.lines = lines
+        self.last_time = last_time
+
+        # Entries first, then the header that makes them count
+        with open(self.path, "r+b") as file:
+            file.seek(INDEX_HEADER.size + len(self.entries) * INDEX_DTYPE.itemsize)
+            file.write(np.array(new_entries, dtype=INDEX_DTYPE).tobytes())
+            file.seek(0)
+            file.write(self.header())
+
+        self.map_entries()
+        return new_lines
+
+    @property
+    def start_time(self) -> float:
+        return float(self.entries["time"][0]) if len(self.entries) > 0 else float("nan")
+
+    @property
+    def end_time(self) -> float:
+        return self.last_time
+
+    def seek_entry(self, time: float) -> tuple[float, int]:
+        """Time and byte offset of an indexed line before `time`, from which
+        at most `stride` lines need to be read to reach the first line at
+        `time`."""
+        if len(self.entries) == 0:
+            return (-float("inf"), 0)
+        index = max(int(np.searchsorted(self.entries["time"], time, "left")) - 1, 0)
+        entry = self.entries[index]
+        return (float(entry["time"]), int(entry["offset"]))
+
+    def seek(self, time: float) -> int:
+        return self.seek_entry(time)[1]
+
+    def read(self, start: float, end: float) -> Iterator[tuple[float, str]]:
+        """The timestamp and JSON text of every indexed line with
+        `start <= time <= end`."""
+        latest, offset = self.seek_entry(start)
+        with open(self.log_path, "rb") as log:
+            log.seek(offset)
+            for line in log:
+                offset += len(line)
+                if offset > self.indexed_bytes:
+                    break
+
+                try:
+                    time = parse_log_time(line)
+                except ValueError:
+                    continue
+                # The same as `update`, so the times match the index
+                time = max(time, latest)
+                latest = time
+                if time > end:
+                    break
+                if time >= start:
+                    text = line.decode("utf-8", "replace")
+                    yield (time, text[text.find(",") + 1 :].strip())
+
+    def fixes(self, start: float, end: float) -> np.ndarray:
+        """Rows of (time, latitude, longitude, altitude) between two times, the
+        same as a `FixHistory` holds."""
+        rows = []
+        for time, text in self.read(start, end):
+            try:
+                packet = decode_packet_fast(text)
+            except PacketDecodeError:
+                continue
+            if packet.gps is not None:
+                rows.append(
+                    (time, packet.gps.latitude, packet.gps.longitude, packet.gps.altitude)
+                )
+        return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def main(arguments: list[str]):
+    if len(arguments) < 1:
+        print("Not enough arguments! Need: <packet log> [stride]")
+        return
+
+    stride = int(arguments[1]) if len(arguments) > 1 else 256
+    index = LogIndex(arguments[0], stride)
+    print(
+        f"Indexed {index.lines} lines in {len(index.entries)} entries,"
+        f" {index.end_time - index.start_time:.1f}s of log, to {index.path}"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -6,6 +6,8 @@
 # Lots of useful formulas for things used here:
 # https://www.movable-type.co.uk/scripts/latlong.html
 
+import argparse
+import multiprocessing
 import pathlib
 from typing import Any, Callable, Optional, Union
 import customtkinter
@@ -14,19 +16,47 @@ from tkintermapview import TkinterMapView
 import serial
 import serial.tools.list_ports
 from threading import Event, Thread
-import json
 import signal
 import tkinter as tk
-import datetime
+import time
 
 ## LOCAL IMPORTS ##
+import ingest
+from history import FixHistory
+from landing import LandingPredictor
+from link_stats import LinkStats
+from log_index import LogIndex
+from motion import MotionPlanner, load_axis_limits
+from plots import TelemetryPlots
+from profiler import DEFAULT_PROFILE_SECONDS, SamplingProfiler
+from render import RenderScheduler
+from replay import ReplayBar
 from rotator import Rotator
 from rotator_command import RotatorCommandWindow
-from utils import GPSPoint, crc8
+from rotator_jobs import RotatorJobRunner
+from snapshot import (
+    Snapshot,
+    SnapshotWriter,
+    planner_state,
+    read_latest_snapshot,
+    restore_planner,
+)
+from telemetry import (
+    DEFAULT_MULTICAST_GROUP,
+    DEFAULT_MULTICAST_PORT,
+    DEFAULT_SERVER_PORT,
+    parse_address,
+)
+from telemetry_server import TelemetryServer
+from uplink import Uplink
+from uplink_command import UplinkCommandWindow
+from utils import GPSPoint
 ###################
 
-ROCKET_PACKET_CONT = None
-"""Global variable storing rocket packet data"""
+FIX_HISTORY = FixHistory()
+"""Global ring buffer of recent rocket GPS fixes"""
+LINK_STATS = LinkStats()
+"""Global timing and quality statistics of the telemetry link"""
 
 
 class App(customtkinter.CTk):
@@ -103,10 +133,24 @@ class App(customtkinter.CTk):
         self.rotator_command_window_button = customtkinter.CTkButton(
             self.frame_left,
             text="Rotator Commands",
-            command=lambda: RotatorCommandWindow(self.rotator),
+            command=lambda: RotatorCommandWindow(self.rotator_jobs),
         )
         self.rotator_command_window_button.grid(pady=10)
 
+        self.uplink_command_window_button = customtkinter.CTkButton(
+            self.frame_left,
+            text="Uplink Commands",
+            command=lambda: UplinkCommandWindow(),
+        )
+        self.uplink_command_window_button.grid(pady=(0, 10))
+
+        self.profile_button = customtkinter.CTkButton(
+            self.frame_left,
+            text="Start Profiling",
+            command=self.toggle_profiler,
+        )
+        self.profile_button.grid(pady=(0, 10))
+
         # Map style settings
         customtkinter.CTkLabel(
             self.frame_left, text="Map Settings:", anchor="w", font=("Noto Sans", 18)
@@ -122,12 +166,17 @@ class App(customtkinter.CTk):
             ],
             command=self.change_map,
         )
-        self.map_option_menu.grid(padx=(20, 20), pady=(0, 20))
+        self.map_option_menu.grid(padx=(20, 20), pady=(0, 10))
+        self.follow_switch = customtkinter.CTkSwitch(
+            self.frame_left, text="Follow Rocket", command=self.toggle_follow
+        )
+        self.follow_switch.grid(pady=(0, 20))
 
         # ============ frame_right ============
 
         self.frame_right.grid_rowconfigure(1, weight=1)
         self.frame_right.grid_rowconfigure(0, weight=0)
+        self.frame_right.grid_rowconfigure(2, weight=0)
         self.frame_right.grid_columnconfigure(0, weight=1)
         self.frame_right.grid_columnconfigure(1, weight=0)
         self.frame_right.grid_columnconfigure(2, weight=1)
@@ -143,6 +192,9 @@ class App(customtkinter.CTk):
             pady=(0, 0),
         )
 
+        self.plots = TelemetryPlots(self.frame_right, FIX_HISTORY, height=140)
+        self.plots.grid(row=2, column=0, columnspan=3, sticky="nswe")
+
         # Right click event handling
         self.map_widget.add_right_click_menu_command(
             label="Set Ground Position",
@@ -161,22 +213,74 @@ class App(customtkinter.CTk):
             try:
                 self.rotator = Rotator(rotator_port)
                 print(f"Rotator protocol v{self.rotator.protocol_version}")
+
+                # Start planning from wherever the mount actually is
+                vertical, horizontal = self.rotator.position()
+                self.planner.reset(vertical, -horizontal)
             except:  # noqa: E722
                 print("Rotator failed to initalize!")
+                return
+
+            self.rotator_port = rotator_port
+
+            # All further commands go through the job runner
+            if self.rotator_jobs is not None:
+                self.rotator_jobs.stop()
+            self.rotator_jobs = RotatorJobRunner(self.rotator)
+            self.rotator_jobs.start()
 
     def set_telemetry(self):
+        rfd_port = self.rfd_port_menu.get()
+        if rfd_port != "Select…":
+            self.start_telemetry(rfd_port.split(maxsplit=1)[0])
+            print("RFD Setup")
+
+    def start_telemetry(self, source: str):
+        """Start reading telemetry from a serial port or network source,
+        stopping any reader that is already running."""
+        if self.args.replay is not None:
+            print("Telemetry is disabled while replaying a log")
+            return
+
+        self.telemetry_source = source
+
         if self.rfd_event is not None:
             self.rfd_event.set()
 
-        rfd_port = self.rfd_port_menu.get()
-        if rfd_port != "Select…":
-            rfd_port = rfd_port.split(maxsplit=1)[0]
+        if FIX_HISTORY.memory is not None:
+            # Ingest in a separate process, sharing the fix history with it
+            context = multiprocessing.get_context("spawn")
+            self.rfd_event = context.Event()
+            serve = None
+            if self.args.serve is not None:
+                serve = parse_address(self.args.serve, DEFAULT_SERVER_PORT)
+            p = context.Process(
+                target=ingest.ingest_process,
+                args=[
+                    source,
+                    self.rfd_event,
+                    FIX_HISTORY.memory.name,
+                    FIX_HISTORY.capacity,
+                    serve,
+                    self.args.multicast,
+                ],
+                kwargs={
+                    "stats_name": LINK_STATS.memory.name,  # type: ignore
+                    "sequenced_uplink": self.args.sequenced_uplink,
+                },
+                name="gps_process",
+                daemon=True,
+            )
+            p.start()
+        else:
             self.rfd_event = Event()
             t = Thread(
-                target=gps_loop, args=[rfd_port, self.rfd_event], name="gps_thread"
+                target=ingest.gps_loop,
+                args=[source, self.rfd_event, FIX_HISTORY, self.telemetry_server],
+                kwargs={"uplink": self.uplink, "stats": LINK_STATS},
+                name="gps_thread",
             )
             t.start()
-            print("RFD Setup")
 
     def rescan_ports(self):
         """Rescan and update the serial ports"""
@@ -221,6 +325,8 @@ class App(customtkinter.CTk):
         except ValueError as e:
             print(f"Invalid value! {e}")
 
+        self.landing.ground_altitude = self.ground_position.alt or 0.0
+
         if self.ground_marker is not None:
             self.ground_marker.set_position(
                 self.ground_position.lat, self.ground_position.lon
@@ -230,6 +336,8 @@ class App(customtkinter.CTk):
                 self.ground_position.lat, self.ground_position.lon
             )
 
+        self.plots.set_ground(self.ground_position)
+
     def right_click_ground_position(self, coords):
         if self.ground_marker is not None:
             self.ground_marker.set_position(coords[0], coords[1])
@@ -237,6 +345,8 @@ class App(customtkinter.CTk):
             self.ground_marker = self.map_widget.set_marker(coords[0], coords[1])
 
         self.ground_position = GPSPoint(coords[0], coords[1], self.ground_position.alt)
+        self.plots.set_ground(self.ground_position)
+        self.landing.ground_altitude = self.ground_position.alt or 0.0
 
         self.ground_settings.latitude.set(coords[0])
         self.ground_pos_toml["latitude"] = float(coords[0])
@@ -249,38 +359,32 @@ class App(customtkinter.CTk):
         )
 
     def set_air_position(self):
-        # print("function ran yay")
-        if ROCKET_PACKET_CONT is None or "gps" not in ROCKET_PACKET_CONT:
-            self.after(500, self.set_air_position)
+        self.show_air_position()
+        self.after(100, self.set_air_position)
+
+    def show_air_position(self):
+        # The fix history is filled by the ingest thread or process, and
+        # nothing needs recalculating until a new fix arrives
+        fix = FIX_HISTORY.latest()
+        if fix is None or FIX_HISTORY.count == self.air_fix_count:
             return
+        self.air_fix_count = FIX_HISTORY.count
 
-        if ROCKET_PACKET_CONT["gps"] is None:
-            self.after(500, self.set_air_position)
-            return
+        _, gps_lat, gps_lon, gps_alt = fix.tolist()
 
-        try:
-            gps_lat = ROCKET_PACKET_CONT["gps"]["latitude"]
-            gps_lon = ROCKET_PACKET_CONT["gps"]["longitude"]
-            gps_alt = ROCKET_PACKET_CONT["gps"]["altitude"]
-        except Exception as e:
-            print(f"Not all fields available: {e}")
-            self.after(500, self.set_air_position)
-            return
-
-        self.telemetry.lat.configure(text=f"{gps_lat:.8f}")
-        self.telemetry.lon.configure(text=f"{gps_lon:.8f}")
-        self.telemetry.alt.configure(text=f"{gps_alt:.2f}m")
+        # Widgets are only touched once per frame, and only if they change
+        self.renderer.set_text(self.telemetry.lat, f"{gps_lat:.8f}")
+        self.renderer.set_text(self.telemetry.lon, f"{gps_lon:.8f}")
+        self.renderer.set_text(self.telemetry.alt, f"{gps_alt:.2f}m")
 
         self.air_position = GPSPoint(gps_lat, gps_lon, gps_alt)
 
         # Update the marker for the air side
-        if self.air_marker is not None:
-            self.air_marker.set_position(gps_lat, gps_lon)
-        else:
-            self.air_marker = self.map_widget.set_marker(gps_lat, gps_lon)
+        self.renderer.move_marker(
+            "air", gps_lat, gps_lon, create=self.map_widget.set_marker
+        )
 
         if self.ground_position is None:
-            self.after(500, self.set_air_position)
             return
 
         # Straight line distance between the ground positions
@@ -294,16 +398,184 @@ class App(customtkinter.CTk):
         horiz = self.ground_position.bearing_mag_corrected_to(self.air_position)
         vert = self.ground_position.elevation_to(self.air_position)
 
-        if self.rotator is not None:
-            self.rotator.set_position_vertical(vert)
-            self.rotator.set_position_horizontal(horiz)
+        # The planner takes care of actually moving the rotator
+        self.planner.set_target(vert, horiz)
+
+        self.renderer.set_text(self.telemetry.rot_az, f"{horiz:.1f}°")
+        self.renderer.set_text(self.telemetry.rot_alt, f"{vert:.1f}°")
+        self.renderer.set_text(self.telemetry.dist, f"{distance:.1f}")
+        self.renderer.set_text(self.telemetry.gr_alt, f"{altitude:.1f}")
+
+    def take_snapshot(self):
+        """Hand the session state to the snapshot writer, which does the slow
+        part on its own thread."""
+        # Nothing worth resuming yet, keep the last session's snapshot
+        if self.rotator_port == "" and self.telemetry_source == "":
+            self.after(1000, self.take_snapshot)
+            return
+
+        self.snapshots.submit(
+            Snapshot(
+                self.rotator_port,
+                self.telemetry_source,
+                self.rotator.is_calibrated if self.rotator is not None else None,
+                planner_state(self.planner),
+            )
+        )
+        self.after(1000, self.take_snapshot)
+
+    def resume(self):
+        """Restore the last session snapshot and reconnect to its ports."""
+        start = time.monotonic()
+        snapshot = read_latest_snapshot()
+        if snapshot is None:
+            print("No session snapshot to resume")
+            return
 
-        self.telemetry.rot_az.configure(text=f"{horiz:.1f}°")
-        self.telemetry.rot_alt.configure(text=f"{vert:.1f}°")
-        self.telemetry.dist.configure(text=f"{distance:.1f}")
-        self.telemetry.gr_alt.configure(text=f"{altitude:.1f}")
+        # Fixes from before the restart, so tracking has a target right away
+        FIX_HISTORY.extend(snapshot.fixes)
+
+        if snapshot.rotator_port != "":
+            self.rotator_port_menu.set(snapshot.rotator_port)
+            self.set_rotator()
+            if self.rotator is None:
+                # Keep the port in the snapshot so the next resume tries again
+                self.rotator_port = snapshot.rotator_port
+            elif snapshot.rotator_calibrated and not self.rotator.is_calibrated:
+                print("Rotator lost its calibration since the snapshot!")
+
+        # A connected rotator already reset the planner to where it really is,
+        # only the targets it was heading for are restored then
+        restore_planner(
+            self.planner, snapshot.planner, targets_only=self.rotator is not None
+        )
 
-        self.after(500, self.set_air_position)
+        if snapshot.telemetry_source != "" and self.args.source is None:
+            self.rfd_port_menu.set(snapshot.telemetry_source)
+            self.start_telemetry(snapshot.telemetry_source)
+
+        print(
+            f"Resumed session from {time.time() - snapshot.written_at:.1f}s ago"
+            f" in {(time.monotonic() - start) * 1000:.0f}ms"
+        )
+
+    def replay_seek(self, fixes):
+        """Show the moment at the end of `fixes`, which replace the history."""
+        FIX_HISTORY.clear()
+        FIX_HISTORY.extend(fixes)
+
+        # Everything reading the history has to start over
+        self.air_fix_count = -1
+        self.plots.set_ground(self.ground_position)
+        self.landing.reset()
+
+        self.show_air_position()
+        self.renderer.flush()
+        self.plots.refresh()
+
+    def update_landing(self):
+        """Draw the latest landing prediction, if it changed since the last
+        one was drawn."""
+        if self.landing.generation != self.landing_generation:
+            self.landing_generation = self.landing.generation
+            prediction = self.landing.prediction
+
+            if prediction is None:
+                self.renderer.remove_marker("landing")
+                if self.landing_polygon is not None:
+                    self.landing_polygon.delete()
+                    self.landing_polygon = None
+            else:
+                self.renderer.move_marker(
+                    "landing",
+                    prediction.latitude,
+                    prediction.longitude,
+                    create=lambda lat, lon: self.map_widget.set_marker(
+                        lat, lon, text="Landing", marker_color_outside="orange"
+                    ),
+                )
+                if self.landing_polygon is not None:
+                    # Move the existing outline instead of recreating it
+                    self.landing_polygon.position_list = prediction.ellipse
+                    self.landing_polygon.draw()
+                else:
+                    self.landing_polygon = self.map_widget.set_polygon(
+                        prediction.ellipse,
+                        fill_color=None,
+                        outline_color="orange",
+                        border_width=2,
+                        name="Landing zone",
+                    )
+
+        self.after(500, self.update_landing)
+
+    def update_link_stats(self):
+        """Show how well the telemetry link is doing."""
+        frames = LINK_STATS["frames"]
+        bad = LINK_STATS["bad_frames"]
+        loss = bad / (frames + bad) if frames + bad > 0 else 0.0
+        self.renderer.set_text(self.telemetry.frames, f"{frames:.0f} ({loss:.1%} bad)")
+        self.renderer.set_text(
+            self.telemetry.jitter,
+            f"{LINK_STATS['jitter'] * 1000:.0f}ms"
+            f" (p95 {LINK_STATS.percentile('jitter_ms', 95):.0f}ms)",
+        )
+        self.renderer.set_text(self.telemetry.gaps, f"{LINK_STATS['gaps']:.0f}")
+        self.renderer.set_text(
+            self.telemetry.drift, f"{LINK_STATS['drift_ppm']:.0f}ppm"
+        )
+        self.after(1000, self.update_link_stats)
+
+    def toggle_profiler(self, signal=0, frame=None):
+        """Start or stop a profile, from the button or SIGUSR1."""
+        duration = self.args.profile
+        if duration is None:
+            duration = DEFAULT_PROFILE_SECONDS
+        self.profiler.toggle(duration)
+
+    def update_profiler(self):
+        # The profile ends on its own, so the button has to follow it
+        self.renderer.set_text(
+            self.profile_button,
+            "Stop Profiling" if self.profiler.running else "Start Profiling",
+        )
+        self.after(500, self.update_profiler)
+
+    def toggle_follow(self):
+        """Keep the rocket in view, recentring the map when it nears the edge."""
+        self.renderer.follow = "air" if self.follow_switch.get() == 1 else None
+
+    def update_rotator(self):
+        """Step the motion planner and send intermediate setpoints to the
+        rotator so it follows the target smoothly."""
+        now = time.monotonic()
+        dt = now - self.last_rotator_update
+        self.last_rotator_update = now
+
+        if self.rotator_jobs is not None:
+            # The mount is not moving while halted, so neither is the plan
+            if self.rotator_jobs.halted:
+                self.after(100, self.update_rotator)
+                return
+
+            # Continue from wherever the mount stopped
+            position = self.rotator_jobs.take_resume_position()
+            if position is not None:
+                vertical, horizontal = position
+                self.planner.reset(vertical, -horizontal)
+
+        # The runner sends it when the serial port is free, without blocking
+        setpoint = self.planner.step(dt)
+        if self.rotator_jobs is not None and setpoint is not None:
+            self.rotator_jobs.set_position(setpoint)
+
+        self.after(100, self.update_rotator)
+
+    def refresh_plots(self):
+        """Redraw the plots on their own timer, no matter how fast telemetry
+        is arriving."""
+        self.plots.refresh()
+        self.after(250, self.refresh_plots)
 
     def change_map(self, new_map: str):
         match new_map:
@@ -337,16 +609,78 @@ class App(customtkinter.CTk):
         if self.rfd_event is not None:
             self.rfd_event.set()
 
+        if self.telemetry_server is not None:
+            self.telemetry_server.close()
+
+        if self.uplink_server is not None:
+            self.uplink_server.close()
+
+        self.landing.stop()
+        self.snapshots.stop()
+        self.profiler.stop()
+
+        if self.rotator_jobs is not None:
+            self.rotator_jobs.stop()
+
         self.destroy()
 
-    def start(self):
+        # Only the GUI process owns the shared fix history and link statistics
+        FIX_HISTORY.unlink()
+        LINK_STATS.unlink()
+
+    def start(self, args: argparse.Namespace):
+        self.args = args
         self.rescan_ports()
 
         # By default the rotator is None
         self.rotator = None
+        self.rotator_jobs = None
+        self.rotator_port = ""
+        self.telemetry_source = ""
+        self.planner = MotionPlanner(*load_axis_limits("rotator.toml"))
+
+        # Landing zone prediction runs on its own thread
+        self.landing = LandingPredictor(FIX_HISTORY)
+        self.landing_generation = 0
+        self.landing_polygon = None
+        self.last_rotator_update = time.monotonic()
+
+        # Session state is written every second for `--resume`
+        self.snapshots = SnapshotWriter(FIX_HISTORY)
+
+        # Samples every thread of this process while toggled on
+        self.profiler = SamplingProfiler()
+
         # RFD thread event
         self.rfd_event = None
 
+        # Republish verified telemetry for other viewers
+        self.telemetry_server = None
+        if args.serve is not None and FIX_HISTORY.memory is None:
+            try:
+                self.telemetry_server = TelemetryServer(
+                    *parse_address(args.serve, DEFAULT_SERVER_PORT),
+                    multicast=args.multicast,
+                )
+                self.telemetry_server.start()
+            except OSError as e:
+                print(f"Failed to start telemetry server: {e}")
+
+        # Uplink commands go out over the port the telemetry reader has open.
+        # With process ingest the ingest process runs the uplink instead.
+        self.uplink = None
+        self.uplink_server = None
+        if FIX_HISTORY.memory is None:
+            self.uplink = Uplink(sequenced=args.sequenced_uplink)
+            self.uplink.start()
+            self.uplink_server = ingest.start_uplink_server(self.uplink, attempts=1)
+
+        if args.resume:
+            self.resume()
+
+        if args.source is not None:
+            self.start_telemetry(args.source)
+
         #
         if pathlib.Path("./ground_location.toml").is_file():
             self.ground_pos_toml = tomlkit.load(
@@ -384,10 +718,34 @@ class App(customtkinter.CTk):
         self.set_ground_parameters()
 
         # Rocket position
-        self.air_marker = None
+        self.air_fix_count = 0
         self.air_position = GPSPoint(0, 0, 0)
 
-        self.after(500, self.set_air_position)
+        self.renderer = RenderScheduler(self, self.map_widget)
+        self.renderer.start()
+
+        if args.replay is not None:
+            self.replay_bar = ReplayBar(
+                self.frame_right, LogIndex(args.replay), self.replay_seek
+            )
+            self.replay_bar.grid(row=3, column=0, columnspan=3, sticky="nswe")
+
+        self.landing.start()
+        self.snapshots.start()
+
+        self.after(100, self.set_air_position)
+        self.after(100, self.update_rotator)
+        self.after(500, self.update_landing)
+        self.after(1000, self.update_link_stats)
+        self.after(250, self.refresh_plots)
+
+        # A replay must not overwrite the snapshot of a real flight
+        if args.replay is None:
+            self.after(1000, self.take_snapshot)
+
+        self.after(500, self.update_profiler)
+        if args.profile is not None:
+            self.profiler.start(args.profile)
 
         self.mainloop()
 
@@ -437,6 +795,25 @@ class Telemetry(customtkinter.CTkFrame):
         sep = tk.Frame(self, bg="#474747", height=1, bd=0)
         sep.grid(row=8, columnspan=4, sticky="ew")
 
+        customtkinter.CTkLabel(self, text="Frames:").grid(row=9, column=0, padx=10)
+        self.frames = customtkinter.CTkLabel(self, width=200, text="...", anchor="w")
+        self.frames.grid(row=9, column=1, columnspan=4)
+
+        customtkinter.CTkLabel(self, text="Jitter:").grid(row=10, column=0, padx=10)
+        self.jitter = customtkinter.CTkLabel(self, width=200, text="...", anchor="w")
+        self.jitter.grid(row=10, column=1, columnspan=4)
+
+        customtkinter.CTkLabel(self, text="Gaps:").grid(row=11, column=0, padx=10)
+        self.gaps = customtkinter.CTkLabel(self, width=50, text="...", anchor="w")
+        self.gaps.grid(row=11, column=1)
+
+        customtkinter.CTkLabel(self, text="Drift:").grid(row=11, column=2, padx=10)
+        self.drift = customtkinter.CTkLabel(self, width=50, text="...", anchor="w")
+        self.drift.grid(row=11, column=3)
+
+        sep = tk.Frame(self, bg="#474747", height=1, bd=0)
+        sep.grid(row=12, columnspan=4, sticky="ew")
+
 
 class GroundSettings(customtkinter.CTkFrame):
     def __init__(self, master, command, **kwargs):
@@ -515,75 +892,78 @@ class LabeledTextEntry(customtkinter.CTkFrame):
         self.entry.insert(0, string)
 
 
-def gps_loop(gps_port: str, event: Event):
-    try:
-        gps_serial = serial.Serial(gps_port, 57600, timeout=1)
-    except IOError as e:
-        print(f"Failed to start GPS loop: {e}")
-        return
-
-    print("Started GPS loop")
-
-    # Ignoring the errors in this is OK because it must not crash!
-    while not event.is_set():
-        try:
-            new_data = gps_serial.readline().decode("utf-8").strip()
-        except Exception as e:
-            print(f"Failed to read telemetry: {e}")
-            continue
-
-        if len(new_data) == 0:
-            continue
-
-        try:
-            received_crc, received_json = new_data.split(maxsplit=1)
-            received_crc = int(received_crc)
-        except Exception as e:
-            print(f"Splitting failed: {e}")
-            continue
-
-        # Calculate CRC from the data
-        calculated_crc = None
-        try:
-            calculated_crc = crc8(received_json.encode("utf-8"))
-        except Exception as e:
-            print(f"Could not calculate new CRC: {e}")
-            continue
-
-        # Compare CRCs if they exist and work
-        if calculated_crc != received_crc:
-            print(f"CRCs do not match ({calculated_crc} != {received_crc})")
-            continue
-        else:
-            print(f"CRCs match ({calculated_crc} == {received_crc})")
-
-        # Load the data as JSON and add it to the packet
-        try:
-            decoded_data = json.loads(received_json)
-            global ROCKET_PACKET_CONT
-            ROCKET_PACKET_CONT = decoded_data
-            print(decoded_data)
-            try:
-                timestamp = datetime.datetime.now().isoformat()
-
-                with open("packet_log.txt", "a") as packetlog:
-                    packetlog.write(timestamp)
-                    packetlog.write(",")
-                    packetlog.write(received_json)
-                    packetlog.write("\n")
-            except Exception as e:
-                print(f"Saving to txt failed: {e}")
-        except Exception as e:
-            print(f"Failed to decode json: {e}")
-
-    # Close the serial port
-    gps_serial.close()
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=App.APP_NAME)
+    parser.add_argument(
+        "--source",
+        help="read telemetry from a serial port, tcp://host:port or udp://group:port",
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const=f"127.0.0.1:{DEFAULT_SERVER_PORT}",
+        metavar="HOST:PORT",
+        help="republish verified telemetry to other viewers over TCP",
+    )
+    parser.add_argument(
+        "--multicast",
+        nargs="?",
+        const=f"{DEFAULT_MULTICAST_GROUP}:{DEFAULT_MULTICAST_PORT}",
+        type=lambda a: parse_address(a, DEFAULT_MULTICAST_PORT),
+        metavar="GROUP:PORT",
+        help="also republish telemetry over UDP multicast (requires --serve)",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="LOG",
+        help="scrub through a recorded packet log instead of reading telemetry",
+    )
+    parser.add_argument(
+        "--sequenced-uplink",
+        action="store_true",
+        help="send uplink commands with sequence numbers, for flight computer "
+        "firmware that echoes them in its acknowledgements",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="reconnect to the ports and restore the tracking state of the "
+        "last session",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_SECONDS,
+        type=float,
+        metavar="SECONDS",
+        help="profile all threads for SECONDS from startup, also the length "
+        "of profiles started from the GUI or with SIGUSR1",
+    )
+    parser.add_argument(
+        "--ingest",
+        choices=["thread", "process"],
+        default="thread",
+        help="read telemetry on a thread, or in a separate process to avoid "
+        "competing with the GUI for the GIL",
+    )
+    args = parser.parse_args()
+    if args.multicast is not None and args.serve is None:
+        parser.error("--multicast requires --serve")
+    return args
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.ingest == "process":
+        FIX_HISTORY = FixHistory.create_shared()
+        LINK_STATS = LinkStats.create_shared()
+
     app = App()
 
     # Catch Ctl + C
     signal.signal(signal.SIGINT, app.on_closing)
+    # Toggle the profiler, `kill -USR1 <pid>`
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, app.toggle_profiler)
 
-    app.start()
+    app.start(args)
@@ -0,0 +1,174 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Motion planning between the pointing math and the rotator. The pointing math
+# produces bearings in the -180→180 range, which jump by a full turn whenever
+# the rocket crosses due south. The planner keeps track of the cumulative
+# azimuth of the mount instead, picks the shortest path to each new target
+# that stays inside the travel limits of the mount, and steps each axis with a
+# trapezoidal velocity profile so the dish follows smoothly.
+
+import math
+import pathlib
+from typing import Optional
+
+import tomlkit
+
+
+class AxisLimits:
+    """Travel and dynamics limits for a single rotator axis, in degrees."""
+
+    def __init__(
+        self,
+        minimum: float,
+        maximum: float,
+        max_rate: float,
+        max_accel: float,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.max_rate = max_rate
+        """Maximum slew rate in degrees per second"""
+        self.max_accel = max_accel
+        """Maximum acceleration in degrees per second squared"""
+
+    def clamp(self, value: float) -> float:
+        """Clamp a position to the travel limits of the axis."""
+        return min(max(value, self.minimum), self.maximum)
+
+
+DEFAULT_VERTICAL_LIMITS = AxisLimits(0.0, 90.0, 20.0, 20.0)
+DEFAULT_HORIZONTAL_LIMITS = AxisLimits(-270.0, 270.0, 30.0, 20.0)
+
+
+def load_axis_limits(path: str) -> tuple[AxisLimits, AxisLimits]:
+    """Load the vertical and horizontal axis limits from a TOML file, falling
+    back to the defaults for anything that is missing."""
+    limits = []
+    document = None
+    if pathlib.Path(path).is_file():
+        with open(path, "r", encoding="utf-8") as file:
+            document = tomlkit.load(file)
+
+    for name, default in (
+        ("vertical", DEFAULT_VERTICAL_LIMITS),
+        ("horizontal", DEFAULT_HORIZONTAL_LIMITS),
+    ):
+        table = document.get(name, {}) if document is not None else {}
+        limits.append(
+            AxisLimits(
+                float(table.get("minimum", default.minimum)),
+                float(table.get("maximum", default.maximum)),
+                float(table.get("max_rate", default.max_rate)),
+                float(table.get("max_accel", default.max_accel)),
+            )
+        )
+
+    return limits[0], limits[1]
+
+
+class AxisState:
+    """The planned position, velocity and target of a single axis."""
+
+    def __init__(self, position: float = 0.0):
+        self.position = position
+        self.velocity = 0.0
+        self.target = position
+
+    def step(self, limits: AxisLimits, dt: float):
+        """Advance the axis by `dt` seconds toward its target."""
+        error = self.target - self.position
+        if error == 0.0 and self.velocity == 0.0:
+            return
+
+        # Fastest speed from which the axis can still stop at the target
+        stopping_speed = math.sqrt(2 * limits.max_accel * abs(error))
+        desired = math.copysign(min(limits.max_rate, stopping_speed), error)
+
+        max_delta = limits.max_accel * dt
+        self.velocity += min(max(desired - self.velocity, -max_delta), max_delta)
+
+        step = self.velocity * dt
+        if abs(step) >= abs(error) and step * error >= 0:
+            # Close enough to land on the target within this step
+            self.position = self.target
+            self.velocity = 0.0
+        else:
+            self.position = limits.clamp(self.position + step)
+
+
+class MotionPlanner:
+    """Turns raw pointing targets into a stream of rate and acceleration
+    limited setpoints for the rotator."""
+
+    def __init__(
+        self,
+        vertical: AxisLimits = DEFAULT_VERTICAL_LIMITS,
+        horizontal: AxisLimits = DEFAULT_HORIZONTAL_LIMITS,
+        deadband: float = 0.05,
+    ):
+        self.vertical_limits = vertical
+        self.horizontal_limits = horizontal
+        self.deadband = deadband
+        """Smallest change in degrees worth sending to the rotator"""
+
+        self.vertical = AxisState()
+        self.horizontal = AxisState()
+        self.last_sent: Optional[tuple[float, float]] = None
+
+    def reset(self, vertical: float, horizontal: float):
+        """Reset the planner to a known mount position, such as one reported by
+        the rotator itself."""
+        self.vertical = AxisState(self.vertical_limits.clamp(vertical))
+        self.horizontal = AxisState(self.horizontal_limits.clamp(horizontal))
+        self.last_sent = None
+
+    def set_target(self, vertical: float, bearing: float):
+        """Set a new pointing target. The bearing may be in any range, it is
+        mapped onto the cumulative azimuth of the mount."""
+        self.vertical.target = self.vertical_limits.clamp(vertical)
+        self.horizontal.target = self.unwrap_azimuth(bearing)
+
+    def unwrap_azimuth(self, bearing: float) -> float:
+        """Find the cumulative azimuth equivalent to `bearing` that is the
+        shortest move from the current position while staying within the travel
+        limits."""
+        current = self.horizontal.position
+        nearest = bearing + 360 * round((current - bearing) / 360)
+
+        candidates = sorted(
+            (nearest - 360, nearest, nearest + 360), key=lambda a: abs(a - current)
+        )
+        for candidate in candidates:
+            if self.horizontal_limits.minimum <= candidate <= self.horizontal_limits.maximum:
+                return candidate
+
+        return self.horizontal_limits.clamp(nearest)
+
+    def step(self, dt: float) -> Optional[tuple[float, float]]:
+        """Advance both axes by `dt` seconds. Returns the new (vertical,
+        horizontal) setpoint if it moved far enough to be worth sending, or
+        `None` otherwise."""
+        self.vertical.step(self.vertical_limits, dt)
+        self.horizontal.step(self.horizontal_limits, dt)
+
+        setpoint = (self.vertical.position, self.horizontal.position)
+        if self.last_sent is not None:
+            small = (
+                abs(setpoint[0] - self.last_sent[0]) < self.deadband
+                and abs(setpoint[1] - self.last_sent[1]) < self.deadband
+            )
+            # Always send the final setpoint once both axes have settled
+            settled = (
+                self.vertical.position == self.vertical.target
+                and self.horizontal.position == self.horizontal.target
+            )
+            if setpoint == self.last_sent or (small and not settled):
+                return None
+
+        self.last_sent = setpoint
+        return setpoint
+
+    def position(self) -> tuple[float, float]:
+        """The current planned (vertical, horizontal) position."""
+        return (self.vertical.position, self.horizontal.position)
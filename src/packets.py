@@ -0,0 +1,148 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Typed telemetry packets. Every packet carries a schema version (the `v` key,
+# assumed to be 1 when missing), and each version has a registered decoder that
+# turns the JSON into a `TelemetryPacket`. The tracker itself only needs a few
+# fields, so `decode_packet_fast` skips copying every other field into
+# `extra`. Parsing is always a single `json.loads`, which no pure Python scan
+# of the text beats. Decoding problems are counted in `STATS` rather than
+# printed.
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+VERSION_KEY = "v"
+DEFAULT_VERSION = 1
+
+
+class PacketDecodeError(ValueError):
+    """A packet could not be decoded or did not match its schema."""
+
+
+@dataclass(slots=True)
+class GPSFix:
+    latitude: float
+    longitude: float
+    altitude: float
+
+
+@dataclass(slots=True)
+class TelemetryPacket:
+    version: int
+    gps: Optional[GPSFix] = None
+    time_ms: Optional[int] = None
+    """Onboard timestamp of the flight computer in milliseconds, if known"""
+    ack: Optional[int] = None
+    """The last uplink command the flight computer acknowledged, if any"""
+    ack_seq: Optional[int] = None
+    """Sequence number of the acknowledged command"""
+    extra: Optional[dict[str, Any]] = None
+    """Every other field, only filled in by the full decoders"""
+
+
+@dataclass(slots=True)
+class DecodeStats:
+    decoded: int = 0
+    fast: int = 0
+    """How many of the decoded packets were decoded without `extra`"""
+    errors: dict[str, int] = field(default_factory=dict)
+    """Count of decoding errors by reason"""
+
+    def error(self, reason: str):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+
+STATS = DecodeStats()
+"""Decoding statistics for this process"""
+
+DECODERS: dict[int, Callable[[dict, bool], TelemetryPacket]] = {}
+"""Decoders from a decoded JSON object, by schema version. The flag says
+whether to keep every other field in `extra`."""
+
+
+def register_decoder(version: int):
+    """Decorator registering a decoder for a schema version."""
+
+    def register(decoder):
+        DECODERS[version] = decoder
+        return decoder
+
+    return register
+
+
+def decode_gps(data: Any) -> Optional[GPSFix]:
+    if data is None:
+        return None
+
+    try:
+        return GPSFix(
+            float(data["latitude"]), float(data["longitude"]), float(data["altitude"])
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise PacketDecodeError(f"invalid gps: {e!r}")
+
+
+def optional_int(data: dict, key: str) -> Optional[int]:
+    value = data.get(key)
+    if value is not None and not isinstance(value, int):
+        raise PacketDecodeError(f"invalid {key}")
+    return value
+
+
+V1_FIELDS = frozenset((VERSION_KEY, "gps", "time", "ack", "ack_seq"))
+"""Fields of a version 1 packet that have their own attribute"""
+
+
+@register_decoder(1)
+def decode_v1(data: dict, extra: bool = True) -> TelemetryPacket:
+    packet = TelemetryPacket(
+        1,
+        decode_gps(data.get("gps")),
+        optional_int(data, "time"),
+        optional_int(data, "ack"),
+        optional_int(data, "ack_seq"),
+    )
+    if extra:
+        packet.extra = {k: v for k, v in data.items() if k not in V1_FIELDS}
+    return packet
+
+
+def decode_packet(text: str, extra: bool = True) -> TelemetryPacket:
+    """Decode a JSON packet. Errors are counted in `STATS` and re-raised as
+    `PacketDecodeError`."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        STATS.error("json")
+        raise PacketDecodeError("invalid json")
+
+    if not isinstance(data, dict):
+        STATS.error("not an object")
+        raise PacketDecodeError("packet is not an object")
+
+    version = data.get(VERSION_KEY, DEFAULT_VERSION)
+    decoder = DECODERS.get(version) if isinstance(version, int) else None
+    if decoder is None:
+        STATS.error("unknown version")
+        raise PacketDecodeError(f"unknown schema version {version!r}")
+
+    try:
+        packet = decoder(data, extra)
+    except PacketDecodeError:
+        STATS.error("schema")
+        raise
+
+    STATS.decoded += 1
+    if not extra:
+        STATS.fast += 1
+    return packet
+
+
+def decode_packet_fast(text: str) -> TelemetryPacket:
+    """Decode only the fields the tracker needs, leaving `extra` empty."""
+    return decode_packet(text, extra=False)
@@ -0,0 +1,258 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Live strip charts of the flight. Samples are pulled from the fix history on a
+# timer that is independent of how fast telemetry arrives, and every chart only
+# keeps the minimum and maximum of its series for each pixel column, so the
+# cost of a redraw is bounded by the width of the chart rather than the length
+# of the flight.
+
+import tkinter as tk
+from typing import Optional
+
+import customtkinter
+import numpy as np
+
+## LOCAL IMPORTS ##
+from history import FixHistory, RingBuffer
+from utils import GPSPoint, ground_distances
+###################
+
+PLOT_FIELDS = ("time", "altitude", "vertical_speed", "range", "elevation")
+
+
+class ColumnDecimator:
+    """Keeps the minimum and maximum of a series for every pixel column of a
+    chart. The time span starts small and doubles whenever a sample falls off
+    the right edge, which only has to merge neighbouring columns."""
+
+    def __init__(self, columns: int, span: float = 60.0):
+        self.initial_span = span
+        self.resize(columns)
+
+    def resize(self, columns: int):
+        """Change the number of columns, which throws away all samples."""
+        self.columns = max(columns, 2)
+        self.clear()
+
+    def clear(self):
+        self.start: Optional[float] = None
+        self.span = self.initial_span
+        self.mins = np.full(self.columns, np.inf)
+        self.maxs = np.full(self.columns, -np.inf)
+
+    def add(self, times: np.ndarray, values: np.ndarray):
+        keep = np.isfinite(times) & np.isfinite(values)
+        times, values = times[keep], values[keep]
+        if len(times) == 0:
+            return
+
+        if self.start is None:
+            self.start = float(times[0])
+
+        while times.max() >= self.start + self.span:
+            self.grow()
+
+        cols = ((times - self.start) * (self.columns / self.span)).astype(np.intp)
+        np.clip(cols, 0, self.columns - 1, out=cols)
+        np.minimum.at(self.mins, cols, values)
+        np.maximum.at(self.maxs, cols, values)
+
+    def grow(self):
+        """Double the time span by merging each pair of columns."""
+        half = (self.columns + 1) // 2
+
+        mins = np.full(half * 2, np.inf)
+        mins[: self.columns] = self.mins
+        maxs = np.full(half * 2, -np.inf)
+        maxs[: self.columns] = self.maxs
+
+        self.mins[:half] = mins.reshape(half, 2).min(axis=1)
+        self.mins[half:] = np.inf
+        self.maxs[:half] = maxs.reshape(half, 2).max(axis=1)
+        self.maxs[half:] = -np.inf
+        self.span *= 2
+
+    def polyline(
+        self, width: int, height: int, pad: int = 4
+    ) -> Optional[tuple[list[float], float, float]]:
+        """Canvas coordinates tracing the min/max envelope of the series, along
+        with the lowest and highest values. Returns `None` if there is no
+        data yet."""
+        filled = np.flatnonzero(self.mins <= self.maxs)
+        if len(filled) == 0:
+            return None
+
+        low = float(self.mins[filled].min())
+        high = float(self.maxs[filled].max())
+        if high - low < 1e-9:
+            low, high = low - 1, high + 1
+
+        scale = (height - 2 * pad) / (high - low)
+        x = filled * (width / self.columns)
+
+        coords = np.empty(len(filled) * 4)
+        coords[0::4] = x
+        coords[1::4] = height - pad - (self.mins[filled] - low) * scale
+        coords[2::4] = x
+        coords[3::4] = height - pad - (self.maxs[filled] - low) * scale
+
+        return (coords.tolist(), low, high)
+
+
+class StripChart(customtkinter.CTkFrame):
+    """A single decimated time series chart."""
+
+    def __init__(self, master, title: str, unit: str, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+
+        self.unit = unit
+
+        customtkinter.CTkLabel(self, text=title, height=20).grid(row=0, column=0)
+
+        self.canvas = tk.Canvas(
+            self, width=150, height=100, bg="#2b2b2b", highlightthickness=0
+        )
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.line = self.canvas.create_line(0, 0, 0, 0, fill="#3b8ed0", width=1)
+        self.high_text = self.canvas.create_text(
+            4, 2, anchor="nw", fill="#dce4ee", font=("Noto Sans", 8)
+        )
+        self.low_text = self.canvas.create_text(
+            4, 98, anchor="sw", fill="#dce4ee", font=("Noto Sans", 8)
+        )
+
+        self.width = 150
+        self.height = 100
+        self.decimator = ColumnDecimator(self.width)
+        self.dirty = False
+        self.needs_rebuild = False
+
+        self.canvas.bind("<Configure>", self.on_resize)
+
+    def on_resize(self, event):
+        if event.width != self.width or event.height != self.height:
+            self.width = event.width
+            self.height = event.height
+            self.canvas.coords(self.low_text, 4, self.height - 2)
+            self.needs_rebuild = True
+
+    def add(self, times: np.ndarray, values: np.ndarray):
+        self.decimator.add(times, values)
+        self.dirty = True
+
+    def rebuild(self, times: np.ndarray, values: np.ndarray):
+        """Re-bucket every sample, after the chart was resized or cleared."""
+        self.decimator.resize(self.width)
+        self.decimator.add(times, values)
+        self.needs_rebuild = False
+        self.dirty = True
+
+    def redraw(self):
+        """Update the existing canvas items in place, if anything changed."""
+        if not self.dirty:
+            return
+        self.dirty = False
+
+        result = self.decimator.polyline(self.width, self.height)
+        if result is None:
+            self.canvas.coords(self.line, 0, 0, 0, 0)
+            self.canvas.itemconfigure(self.high_text, text="")
+            self.canvas.itemconfigure(self.low_text, text="")
+            return
+
+        coords, low, high = result
+        self.canvas.coords(self.line, *coords)
+        self.canvas.itemconfigure(self.high_text, text=f"{high:.1f}{self.unit}")
+        self.canvas.itemconfigure(self.low_text, text=f"{low:.1f}{self.unit}")
+
+
+def derive_samples(
+    fixes: np.ndarray, ground: GPSPoint, previous: Optional[np.ndarray]
+) -> np.ndarray:
+    """Turn rows of (time, latitude, longitude, altitude) fixes into rows of
+    `PLOT_FIELDS` as seen from the ground station. `previous` is the last fix
+    before these, used for the first vertical speed."""
+    times = fixes[:, 0]
+    altitudes = fixes[:, 3]
+
+    distances = ground_distances(ground.lat, ground.lon, fixes[:, 1], fixes[:, 2])
+    heights = altitudes - (ground.alt or 0.0)
+
+    if previous is not None:
+        dt = np.diff(times, prepend=previous[0])
+        dalt = np.diff(altitudes, prepend=previous[3])
+    else:
+        dt = np.diff(times, prepend=np.nan)
+        dalt = np.diff(altitudes, prepend=np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vertical_speed = np.where(dt > 0, dalt / dt, np.nan)
+
+    return np.column_stack(
+        (
+            times,
+            altitudes,
+            vertical_speed,
+            np.hypot(distances, heights),
+            np.degrees(np.arctan2(heights, distances)),
+        )
+    )
+
+
+class TelemetryPlots(customtkinter.CTkFrame):
+    """Altitude, vertical speed, range and elevation against time."""
+
+    def __init__(self, master, history: FixHistory, **kwargs):
+        super().__init__(master, corner_radius=0, **kwargs)
+
+        self.history = history
+        self.seq = 0
+        self.previous_fix: Optional[np.ndarray] = None
+        self.ground: Optional[GPSPoint] = None
+        self.samples = RingBuffer(PLOT_FIELDS, capacity=32768)
+
+        self.charts = {
+            "altitude": StripChart(self, "Altitude", "m"),
+            "vertical_speed": StripChart(self, "Vertical Speed", "m/s"),
+            "range": StripChart(self, "Range", "m"),
+            "elevation": StripChart(self, "Elevation", "°"),
+        }
+        for i, chart in enumerate(self.charts.values()):
+            self.grid_columnconfigure(i, weight=1)
+            chart.grid(row=0, column=i, padx=5, pady=5, sticky="nsew")
+
+    def set_ground(self, ground: GPSPoint):
+        """Change the ground station position, which recomputes every sample
+        still in the fix history."""
+        self.ground = GPSPoint(ground.lat, ground.lon, ground.alt)
+        self.seq = 0
+        self.previous_fix = None
+        self.samples.clear()
+        for chart in self.charts.values():
+            chart.needs_rebuild = True
+
+    def refresh(self):
+        """Pull any new fixes from the history and redraw the charts that
+        changed. This is meant to be called on a fixed timer."""
+        if self.ground is None:
+            return
+
+        fixes, self.seq = self.history.since(self.seq)
+        if len(fixes) > 0:
+            samples = derive_samples(fixes, self.ground, self.previous_fix)
+            self.previous_fix = fixes[-1]
+            self.samples.extend(samples)
+
+            for name, chart in self.charts.items():
+                if not chart.needs_rebuild:
+                    chart.add(samples[:, 0], samples[:, self.samples.column(name)])
+
+        for name, chart in self.charts.items():
+            if chart.needs_rebuild:
+                samples = self.samples.since(0)[0]
+                chart.rebuild(samples[:, 0], samples[:, self.samples.column(name)])
+            chart.redraw()
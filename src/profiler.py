@@ -0,0 +1,160 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# A sampling profiler that can be switched on while the tracker is running, for
+# when the GUI stutters somewhere no other profiler can be attached. For a fixed
+# window, a background thread records the stack of every other thread a few
+# hundred times a second. The stacks are written as a collapsed stack file,
+# one `thread;outer;...;inner count` line per unique stack, which flamegraph.pl
+# and speedscope both open, along with a summary of the hottest functions.
+
+import datetime
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType
+from typing import Optional
+
+DEFAULT_PROFILE_SECONDS = 10.0
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads on a background thread."""
+
+    def __init__(self, interval: float = 0.005, output_dir: str = ".", top: int = 20):
+        self.interval = interval
+        """Seconds between samples"""
+        self.output_dir = output_dir
+        self.top = top
+        """Number of functions in the summary"""
+
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.labels: dict[CodeType, str] = {}
+        self.last_output: Optional[str] = None
+        """Path of the last collapsed stack file written"""
+
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, duration: float = DEFAULT_PROFILE_SECONDS) -> bool:
+        """Profile for `duration` seconds, unless already profiling."""
+        if self.running:
+            return False
+
+        self.stacks.clear()
+        self.samples = 0
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.run, args=(duration,), name="profiler", daemon=True
+        )
+        self.thread.start()
+        print(f"Profiling for {duration:.0f}s")
+        return True
+
+    def stop(self):
+        """End the profile early, it is still written out."""
+        self.stop_event.set()
+
+    def toggle(self, duration: float = DEFAULT_PROFILE_SECONDS):
+        if self.running:
+            self.stop()
+        else:
+            self.start(duration)
+
+    def label(self, code: CodeType) -> str:
+        # Labels are cached, building strings for every frame of every sample
+        # would cost more than walking the stacks
+        label = self.labels.get(code)
+        if label is None:
+            label = (
+                f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                f":{code.co_firstlineno})"
+            )
+            self.labels[code] = label
+        return label
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(self.label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def run(self, duration: float):
+        start = time.monotonic()
+        deadline = start + duration
+        next_sample = start
+        while not self.stop_event.is_set() and time.monotonic() < deadline:
+            self.sample()
+            # Sleep to the next tick, skipping ticks if sampling fell behind
+            next_sample += self.interval
+            delay = next_sample - time.monotonic()
+            if delay < 0:
+                next_sample = time.monotonic()
+                delay = 0
+            self.stop_event.wait(delay)
+
+        try:
+            self.write(time.monotonic() - start)
+        except OSError as e:
+            print(f"Failed to write profile: {e}")
+
+    def summary(self, elapsed: float) -> str:
+        """The functions most samples were taken in, and the functions most
+        samples were taken under."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            functions = stack[1:]
+            if len(functions) == 0:
+                continue
+            own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+
+        samples = max(sum(self.stacks.values()), 1)
+        lines = [
+            f"{self.samples} samples over {elapsed:.1f}s"
+            f" of {len({stack[0] for stack in self.stacks})} threads",
+            "",
+            f"Top {self.top} functions by own samples:",
+            f"{'own':>7} {'total':>7}  function",
+        ]
+        for function, count in own.most_common(self.top):
+            lines.append(
+                f"{count / samples:7.1%} {total[function] / samples:7.1%}  {function}"
+            )
+        return "\n".join(lines)
+
+    def write(self, elapsed: float):
+        name = "profile_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, name)
+
+        with open(path + ".folded", "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.items():
+                file.write(f"{';'.join(stack)} {count}\n")
+
+        summary = self.summary(elapsed)
+        with open(path + ".txt", "w", encoding="utf-8") as file:
+            file.write(summary + "\n")
+
+        self.last_output = path + ".folded"
+        print(summary)
+        print(f"Wrote profile to {path}.folded")
@@ -0,0 +1,163 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Batched rendering of telemetry labels and map markers. Widget updates are
+# collected during a frame and applied together once per frame, and any update
+# that would not change what is on screen (the same text at display precision,
+# or a marker that stays on the same pixel or off the map) is skipped entirely,
+# since every `configure()` and marker move costs a Tk redraw.
+
+import math
+from typing import Any, Callable, Optional
+
+FOLLOW_MARGIN = 0.2
+"""Fraction of the map on each side the rocket may enter before the map
+recentres on it when following"""
+
+
+def tile_position(latitude: float, longitude: float, zoom: int) -> tuple[float, float]:
+    """Position in Web Mercator tiles, the same projection the map uses."""
+    n = 2.0**zoom
+    lat = math.radians(latitude)
+    x = (longitude + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n
+    return (x, y)
+
+
+def canvas_position(map_widget, latitude: float, longitude: float) -> tuple[int, int]:
+    """Pixel position of a coordinate on the map canvas."""
+    x, y = tile_position(latitude, longitude, round(map_widget.zoom))
+    left, top = map_widget.upper_left_tile_pos
+    right, bottom = map_widget.lower_right_tile_pos
+    return (
+        round((x - left) / (right - left) * map_widget.width),
+        round((y - top) / (bottom - top) * map_widget.height),
+    )
+
+
+class RenderScheduler:
+    """Coalesces label and marker updates into one redraw per frame."""
+
+    def __init__(self, root, map_widget, interval: int = 100):
+        self.root = root
+        self.map_widget = map_widget
+        self.interval = interval
+        """Milliseconds between frames"""
+
+        self.texts: dict[Any, str] = {}
+        """Text currently shown by each label"""
+        self.pending_texts: dict[Any, str] = {}
+
+        self.markers: dict[str, Any] = {}
+        self.drawn: dict[str, tuple] = {}
+        """Viewport and pixel each marker was last drawn at, with `None` for
+        markers off the map"""
+        self.pending_markers: dict[str, tuple[float, float]] = {}
+        self.marker_factories: dict[str, Callable[[float, float], Any]] = {}
+
+        self.follow: Optional[str] = None
+        """Name of the marker the map keeps in view, if any"""
+
+        self.applied = 0
+        self.skipped = 0
+        """Number of updates applied and skipped, for benchmarking"""
+
+    def start(self):
+        self.root.after(self.interval, self.frame)
+
+    def frame(self):
+        self.flush()
+        self.root.after(self.interval, self.frame)
+
+    def set_text(self, label, text: str):
+        """Show `text` on `label` in the next frame, unless it already is."""
+        if self.texts.get(label) == text:
+            self.pending_texts.pop(label, None)
+            self.skipped += 1
+        else:
+            self.pending_texts[label] = text
+
+    def move_marker(
+        self,
+        name: str,
+        latitude: float,
+        longitude: float,
+        create: Optional[Callable] = None,
+    ):
+        """Move the marker called `name` in the next frame, creating it with
+        `create(latitude, longitude)` if it does not exist yet. Only the
+        latest move of each marker within a frame is drawn."""
+        if create is not None:
+            self.marker_factories.setdefault(name, create)
+        self.pending_markers[name] = (latitude, longitude)
+
+    def remove_marker(self, name: str):
+        """Remove the marker called `name` from the map, if it exists."""
+        self.pending_markers.pop(name, None)
+        self.drawn.pop(name, None)
+        marker = self.markers.pop(name, None)
+        if marker is not None:
+            marker.delete()
+
+    def flush(self):
+        for label, text in self.pending_texts.items():
+            label.configure(text=text)
+            self.texts[label] = text
+            self.applied += 1
+        self.pending_texts.clear()
+
+        if len(self.pending_markers) == 0:
+            return
+
+        moves = self.pending_markers
+        self.pending_markers = {}
+
+        # Recentring redraws the whole map, markers included, so the markers
+        # only need their new position
+        if self.follow in moves and self.needs_recentre(*moves[self.follow]):
+            for name, position in moves.items():
+                if name in self.markers:
+                    self.markers[name].position = position
+                else:
+                    self.markers[name] = self.marker_factories[name](*position)
+            self.map_widget.set_position(*moves[self.follow])
+            for name in self.markers:
+                self.drawn[name] = self.drawn_state(self.markers[name].position)
+            self.applied += 1
+            return
+
+        for name, position in moves.items():
+            state = self.drawn_state(position)
+
+            if name not in self.markers:
+                self.markers[name] = self.marker_factories[name](*position)
+            else:
+                marker = self.markers[name]
+                marker.position = position
+
+                # Skip markers that stay on the same pixel or off the map,
+                # which the map itself draws whenever it is moved
+                if state == self.drawn.get(name):
+                    self.skipped += 1
+                    continue
+                marker.draw()
+
+            self.drawn[name] = state
+            self.applied += 1
+
+    def drawn_state(self, position: tuple[float, float]):
+        """The viewport and the pixel of `position`, or `None` instead of the
+        pixel if it is off the map."""
+        viewport = (self.map_widget.zoom, self.map_widget.upper_left_tile_pos)
+        x, y = canvas_position(self.map_widget, *position)
+        if 0 <= x <= self.map_widget.width and 0 <= y <= self.map_widget.height:
+            return (viewport, (x, y))
+        return (viewport, None)
+
+    def needs_recentre(self, latitude: float, longitude: float) -> bool:
+        x, y = canvas_position(self.map_widget, latitude, longitude)
+        width, height = self.map_widget.width, self.map_widget.height
+        return not (
+            FOLLOW_MARGIN * width <= x <= (1 - FOLLOW_MARGIN) * width
+            and FOLLOW_MARGIN * height <= y <= (1 - FOLLOW_MARGIN) * height
+        )
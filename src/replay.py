@@ -0,0 +1,109 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Scrubbing through a recorded flight. The slider position is turned into a
+# time, the `LogIndex` finds where that time is in the packet log, and only the
+# fixes in a short trail before it are read back. Slider events are coalesced
+# so a fast drag only ever seeks to where the slider ended up. Lines appended
+# to the log are indexed on a background thread, so a burst of them never
+# blocks Tk.
+
+import datetime
+from threading import Event, Thread
+from typing import Callable
+
+import customtkinter
+import numpy as np
+
+## LOCAL IMPORTS ##
+from log_index import LogIndex
+###################
+
+
+class ReplayBar(customtkinter.CTkFrame):
+    """A slider over the time span of a packet log."""
+
+    def __init__(
+        self,
+        master,
+        index: LogIndex,
+        on_seek: Callable[[np.ndarray], None],
+        trail: float = 30.0,
+        **kwargs,
+    ):
+        super().__init__(master, corner_radius=0, **kwargs)
+
+        self.index = index
+        self.on_seek = on_seek
+        self.trail = trail
+        """Seconds of fixes before the selected moment to show"""
+
+        self.target = 0.0
+        self.seek_pending = False
+
+        self.shown_duration = self.duration()
+        """Duration of the log the slider covers"""
+        self.log_grew = Event()
+        self.stop_event = Event()
+        self.follower = Thread(target=self.index_log, name="log_follower", daemon=True)
+
+        self.grid_columnconfigure(0, weight=1)
+        self.slider = customtkinter.CTkSlider(
+            self, from_=0, to=max(self.shown_duration, 1.0), command=self.on_slide
+        )
+        self.slider.set(0)
+        self.slider.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+        self.time_label = customtkinter.CTkLabel(self, width=220, text="", anchor="w")
+        self.time_label.grid(row=0, column=1, padx=10)
+
+        self.follower.start()
+        self.after(500, self.follow_log)
+
+    def duration(self) -> float:
+        if len(self.index.entries) == 0:
+            return 0.0
+        return self.index.end_time - self.index.start_time
+
+    def on_slide(self, value: float):
+        self.target = value
+        if not self.seek_pending:
+            self.seek_pending = True
+            self.after_idle(self.seek)
+
+    def seek(self):
+        self.seek_pending = False
+        if len(self.index.entries) == 0:
+            return
+
+        moment = self.index.start_time + self.target
+        self.on_seek(self.index.fixes(moment - self.trail, moment))
+
+        wall_time = datetime.datetime.fromtimestamp(moment).strftime("%H:%M:%S.%f")[:-5]
+        self.time_label.configure(text=f"T+{self.target:.1f}s ({wall_time})")
+
+    def index_log(self):
+        """Index lines appended to the log since it was opened."""
+        while not self.stop_event.wait(2.0):
+            try:
+                if self.index.update() > 0:
+                    self.log_grew.set()
+            except OSError as e:
+                print(f"Failed to index log: {e}")
+
+    def follow_log(self):
+        """Extend the slider over newly indexed packets, staying at the end of
+        the log if the slider was already there."""
+        if self.log_grew.is_set():
+            self.log_grew.clear()
+            at_end = self.target >= self.shown_duration
+            self.shown_duration = self.duration()
+            self.slider.configure(to=max(self.shown_duration, 1.0))
+            if at_end:
+                self.slider.set(self.duration())
+                self.on_slide(self.duration())
+
+        self.after(500, self.follow_log)
+
+    def destroy(self):
+        self.stop_event.set()
+        super().destroy()
@@ -3,19 +3,29 @@ import customtkinter
 
 
 ## LOCAL IMPORTS ##
-from rotator import MovementCommand as mvc, Rotator
+from rotator import MovementCommand as mvc
+from rotator_jobs import JobState, RotatorJobRunner
 ###################
 
+JOG_STOPS = {
+    mvc.UP: mvc.STOP_VERTICAL,
+    mvc.DOWN: mvc.STOP_VERTICAL,
+    mvc.LEFT: mvc.STOP_HORIZONTAL,
+    mvc.RIGHT: mvc.STOP_HORIZONTAL,
+}
+"""The command that stops the axis each jog command moves"""
+
 
 class RotatorCommandWindow(customtkinter.CTkToplevel):
-    def __init__(self, rotator: Optional[Rotator]):
+    def __init__(self, jobs: Optional[RotatorJobRunner]):
         super().__init__()
 
         self.title("Rotator Commands")
         # self.geometry(str(self.WIDTH) + "x" + str(self.HEIGHT))
         # self.minsize(self.WIDTH, self.HEIGHT)
 
-        self.rotator = rotator
+        # Every command runs on the job runner, never on the Tk thread
+        self.jobs = jobs
 
         customtkinter.CTkLabel(
             self, text="Calibrate:", anchor="w", font=("Noto Sans", 18)
@@ -33,7 +43,10 @@ class RotatorCommandWindow(customtkinter.CTkToplevel):
         )
         self.calv_button.grid(pady=10, padx=20, row=0, column=0, sticky="w")
         self.calv_set_button = customtkinter.CTkButton(
-            self.frame_top, text="Set", width=100, command=self.calibrate_vertical(True)
+            self.frame_top,
+            text="Set",
+            width=100,
+            command=lambda: self.calibrate_vertical(True),
         )
         self.calv_set_button.grid(pady=10, padx=20, row=0, column=1, sticky="w")
         self.calh_button = customtkinter.CTkButton(
@@ -57,60 +70,109 @@ class RotatorCommandWindow(customtkinter.CTkToplevel):
         self.f_ctrl.grid_rowconfigure(0, weight=1)
         self.f_ctrl.grid_rowconfigure(4, weight=1)
 
-        self.up_button = customtkinter.CTkButton(
-            self.f_ctrl,
-            text="UP",
-            width=50,
-            height=50,
-            command=lambda: self.movc([mvc.UP]),
-        )
+        # The direction buttons move while they are held down
+        self.up_button = self.jog_button("UP", mvc.UP)
         self.up_button.grid(column=1, row=1, padx=5, pady=5, sticky="ew")
-        self.left_button = customtkinter.CTkButton(
-            self.f_ctrl,
-            text="LEFT",
-            width=50,
-            height=50,
-            command=lambda: self.movc([mvc.LEFT]),
-        )
+        self.left_button = self.jog_button("LEFT", mvc.LEFT)
         self.left_button.grid(column=0, row=2, padx=10, pady=5, sticky="ew")
-        self.right_button = customtkinter.CTkButton(
-            self.f_ctrl,
-            text="RIGHT",
-            width=50,
-            height=50,
-            command=lambda: self.movc([mvc.RIGHT]),
-        )
+        self.right_button = self.jog_button("RIGHT", mvc.RIGHT)
         self.right_button.grid(column=2, row=2, padx=10, pady=5, sticky="ew")
-        self.down_button = customtkinter.CTkButton(
-            self.f_ctrl,
-            text="DOWN",
-            width=50,
-            height=50,
-            command=lambda: self.movc([mvc.DOWN]),
-        )
+        self.down_button = self.jog_button("DOWN", mvc.DOWN)
         self.down_button.grid(column=1, row=3, padx=5, pady=5, sticky="ew")
 
-        self.down_button = customtkinter.CTkButton(
+        self.stop_button = customtkinter.CTkButton(
             self.f_ctrl,
             text="STOP",
             width=50,
             height=50,
             command=lambda: self.movc([mvc.STOP_VERTICAL, mvc.STOP_HORIZONTAL]),
         )
-        self.down_button.grid(column=1, row=2, padx=5, pady=5, sticky="ew")
+        self.stop_button.grid(column=1, row=2, padx=5, pady=5, sticky="ew")
+
+        self.halt_button = customtkinter.CTkButton(
+            self,
+            text="HALT",
+            fg_color="#b22222",
+            hover_color="#8b0000",
+            command=self.halt,
+        )
+        self.halt_button.grid(pady=(10, 0), padx=20, sticky="ew")
+        self.resume_button = customtkinter.CTkButton(
+            self, text="Resume Tracking", command=self.resume
+        )
+        self.resume_button.grid(pady=10, padx=20, sticky="ew")
+
+        customtkinter.CTkLabel(
+            self, text="Jobs:", anchor="w", font=("Noto Sans", 18)
+        ).grid(pady=(0, 5))
+
+        self.jobs_label = customtkinter.CTkLabel(
+            self, text="", anchor="w", justify="left", width=300
+        )
+        self.jobs_label.grid(padx=20, sticky="w")
+        self.cancel_button = customtkinter.CTkButton(
+            self, text="Cancel Job", width=100, command=self.cancel
+        )
+        self.cancel_button.grid(pady=10)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.refresh_id = self.after(200, self.refresh)
+
+    def jog_button(self, text: str, command: mvc) -> customtkinter.CTkButton:
+        button = customtkinter.CTkButton(self.f_ctrl, text=text, width=50, height=50)
+        button.bind("<ButtonPress-1>", lambda _: self.jog(command))
+        button.bind("<ButtonRelease-1>", lambda _: self.stop_jog(command))
+        return button
 
     def calibrate_vertical(self, Set: Optional[bool] = False):
-        if self.rotator is not None:
-            if Set:
-                self.rotator.calibrate_vertical(Set)
-            else:
-                self.rotator.calibrate_vertical()
+        if self.jobs is not None:
+            self.jobs.calibrate_vertical(bool(Set))
 
     def calibrate_horizontal(self):
-        if self.rotator is not None:
-            self.rotator.calibrate_horizontal()
+        if self.jobs is not None:
+            self.jobs.calibrate_horizontal()
 
     def movc(self, commands: list[mvc]):
-        if self.rotator is not None:
-            for command in commands:
-                self.rotator.move(command)
+        if self.jobs is not None:
+            self.jobs.move(commands)
+
+    def jog(self, command: mvc):
+        if self.jobs is not None:
+            self.jobs.jog(command)
+
+    def stop_jog(self, command: mvc):
+        if self.jobs is not None:
+            self.jobs.stop_jog(JOG_STOPS[command])
+
+    def halt(self):
+        if self.jobs is not None:
+            self.jobs.halt()
+
+    def resume(self):
+        if self.jobs is not None:
+            self.jobs.resume()
+
+    def cancel(self):
+        """Cancel the most recent job that has not finished."""
+        if self.jobs is None:
+            return
+        for job in reversed(self.jobs.recent):
+            if job.state in (JobState.QUEUED, JobState.RUNNING):
+                self.jobs.cancel(job)
+                break
+
+    def refresh(self):
+        if self.jobs is None:
+            text = "No rotator connected"
+        else:
+            text = "\n".join(job.describe() for job in reversed(self.jobs.recent))
+            if self.jobs.halted:
+                text = "Tracking halted\n" + text
+        if self.jobs_label.cget("text") != text:
+            self.jobs_label.configure(text=text)
+
+        self.refresh_id = self.after(200, self.refresh)
+
+    def on_closing(self):
+        self.after_cancel(self.refresh_id)
+        self.destroy()
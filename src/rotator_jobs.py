@@ -0,0 +1,244 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Runs rotator commands on their own thread, so that slow serial round trips
+# and calibrations never block Tk. Everything that talks to the rotator goes
+# through one runner, which keeps commands and their responses from
+# interleaving on the serial port. In order of priority it runs:
+#
+#   1. HALT, which also cancels everything queued
+#   2. queued jobs, such as calibration or jogging, one step at a time
+#   3. the latest tracking setpoint, older ones are simply replaced
+#
+# HALT latches: tracking setpoints are dropped until tracking is resumed, which
+# first reads back where the mount stopped so tracking can continue from there.
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from threading import Condition, Thread
+from typing import Any, Callable, Optional
+
+## LOCAL IMPORTS ##
+from rotator import MovementCommand, Rotator, RotatorException
+###################
+
+
+class JobState(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class RotatorJob:
+    name: str
+    steps: list[tuple[str, Callable[[Rotator], Any]]]
+    """Description and action of every step, run in order"""
+    state: JobState = JobState.QUEUED
+    completed: int = 0
+    """Number of steps completed"""
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def progress(self) -> float:
+        return self.completed / len(self.steps) if len(self.steps) > 0 else 1.0
+
+    def describe(self) -> str:
+        if self.state == JobState.RUNNING and self.completed < len(self.steps):
+            return f"{self.name}: {self.steps[self.completed][0]} ({self.progress:.0%})"
+        elif self.state == JobState.FAILED:
+            return f"{self.name}: failed ({self.error})"
+        return f"{self.name}: {self.state.value}"
+
+
+class RotatorJobRunner:
+    """Serializes all commands to one rotator on a background thread."""
+
+    def __init__(self, rotator: Rotator, history: int = 8):
+        self.rotator = rotator
+        self.condition = Condition()
+        self.queue: deque[RotatorJob] = deque()
+        self.recent: deque[RotatorJob] = deque(maxlen=history)
+        """Recently submitted jobs, for display"""
+        self.running: Optional[RotatorJob] = None
+        self.halt_requested = False
+        self.halted = False
+        """Tracking setpoints are dropped while halted"""
+        self.resume_position: Optional[tuple[float, float]] = None
+        """Where the mount was when tracking was resumed, until it is taken"""
+        self.setpoint: Optional[tuple[float, float]] = None
+        self.jogging = 0
+        """Number of jog buttons held, tracking setpoints wait until it is 0"""
+        self.stopped = False
+
+        self.thread = Thread(target=self.run, name="rotator_jobs", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def submit(
+        self, name: str, steps: list[tuple[str, Callable[[Rotator], Any]]]
+    ) -> RotatorJob:
+        job = RotatorJob(name, steps)
+        with self.condition:
+            self.queue.append(job)
+            self.recent.append(job)
+            self.condition.notify_all()
+        return job
+
+    def cancel(self, job: RotatorJob):
+        """Cancel a queued job, or stop a running one before its next step."""
+        with self.condition:
+            if job.state == JobState.QUEUED:
+                self.queue.remove(job)
+                job.state = JobState.CANCELLED
+            elif job.state == JobState.RUNNING:
+                job.cancel_requested = True
+
+    def halt(self):
+        """Emergency stop, ahead of anything queued, which is cancelled.
+        Tracking stays stopped until `resume` is called."""
+        with self.condition:
+            for job in self.queue:
+                job.state = JobState.CANCELLED
+            self.queue.clear()
+            if self.running is not None:
+                self.running.cancel_requested = True
+            self.setpoint = None
+            self.jogging = 0
+            self.halt_requested = True
+            self.halted = True
+            self.resume_position = None
+            self.condition.notify_all()
+
+    def resume(self) -> RotatorJob:
+        """Re-arm tracking after a HALT, once the position the mount stopped
+        at has been read back."""
+
+        def read_position(rotator: Rotator):
+            position = rotator.position()
+            with self.condition:
+                self.resume_position = position
+                self.halted = False
+
+        return self.submit("Resume tracking", [("reading position", read_position)])
+
+    def take_resume_position(self) -> Optional[tuple[float, float]]:
+        """The position read when tracking resumed, only returned once."""
+        with self.condition:
+            position = self.resume_position
+            self.resume_position = None
+            return position
+
+    def set_position(self, setpoint: tuple[float, float]):
+        """Move to a tracking setpoint once nothing more important is waiting,
+        replacing any setpoint that has not been sent yet. Ignored while
+        halted."""
+        with self.condition:
+            if self.halted:
+                return
+            self.setpoint = setpoint
+            self.condition.notify_all()
+
+    def calibrate_vertical(self, set: bool = False) -> RotatorJob:
+        return self.submit(
+            "Calibrate vertical" + (" (set)" if set else ""),
+            [
+                ("CALV", lambda r: r.calibrate_vertical(set)),
+                ("checking calibration", self.check_calibration),
+            ],
+        )
+
+    def calibrate_horizontal(self) -> RotatorJob:
+        return self.submit(
+            "Calibrate horizontal",
+            [
+                ("CALH", lambda r: r.calibrate_horizontal()),
+                ("checking calibration", self.check_calibration),
+            ],
+        )
+
+    def move(self, commands: list[MovementCommand]) -> RotatorJob:
+        return self.submit(
+            "Move " + ", ".join(c.name for c in commands),
+            [(f"MOVC {c.value}", lambda r, c=c: r.move(c)) for c in commands],
+        )
+
+    def jog(self, command: MovementCommand) -> RotatorJob:
+        """Start moving while a jog button is held."""
+        with self.condition:
+            self.jogging += 1
+        return self.move([command])
+
+    def stop_jog(self, command: MovementCommand) -> RotatorJob:
+        """Stop the axis a released jog button was moving."""
+        job = self.move([command])
+        with self.condition:
+            self.jogging = max(self.jogging - 1, 0)
+        return job
+
+    @staticmethod
+    def check_calibration(rotator: Rotator):
+        rotator.is_calibrated = rotator.calibrated()
+
+    def next_work(self):
+        """Wait for the most important thing to do."""
+        with self.condition:
+            while True:
+                if self.stopped:
+                    return None
+                if self.halt_requested:
+                    self.halt_requested = False
+                    return "halt"
+                if len(self.queue) > 0:
+                    self.running = self.queue.popleft()
+                    self.running.state = JobState.RUNNING
+                    self.running.started = time.monotonic()
+                    return self.running
+                if self.setpoint is not None and self.jogging == 0:
+                    setpoint = self.setpoint
+                    self.setpoint = None
+                    return setpoint
+                self.condition.wait()
+
+    def run(self):
+        while (work := self.next_work()) is not None:
+            try:
+                if work == "halt":
+                    self.rotator.halt()
+                elif isinstance(work, RotatorJob):
+                    self.run_job(work)
+                else:
+                    self.rotator.set_position(work)
+            except (Exception, RotatorException) as e:
+                print(f"Rotator command failed: {e!r}")
+
+    def run_job(self, job: RotatorJob):
+        try:
+            for _, action in job.steps:
+                # HALT and cancellation take effect between steps
+                with self.condition:
+                    if job.cancel_requested or self.halt_requested:
+                        job.state = JobState.CANCELLED
+                        return
+                action(self.rotator)
+                job.completed += 1
+            job.state = JobState.DONE
+        except (Exception, RotatorException) as e:
+            job.state = JobState.FAILED
+            job.error = repr(e)
+            print(f"Rotator job {job.name} failed: {e!r}")
+        finally:
+            with self.condition:
+                self.running = None
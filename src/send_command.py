@@ -1,28 +1,64 @@
-import serial
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Send an uplink command through a running tracker, which owns the RFD port
+# and retries the command until the flight computer acknowledges it.
+#
+# Usage: python send_command.py <command value> [host:port]
+
+import socket
 import sys
 
-import utils
+## LOCAL IMPORTS ##
+from telemetry import parse_address
+from uplink import DEFAULT_UPLINK_PORT, FINAL_STATES
+###################
 
 
 def main(arguments: list[str]):
-    if len(arguments) < 2:
-        print("Not enough arguments! Need: <serial port> <command value>")
+    if len(arguments) < 1:
+        print("Not enough arguments! Need: <command value> [host:port]")
         return
 
+    address = ("127.0.0.1", DEFAULT_UPLINK_PORT)
+    if len(arguments) > 1:
+        address = parse_address(arguments[1], DEFAULT_UPLINK_PORT)
+
     try:
-        gps_serial = serial.Serial(
-            arguments[0],
-            57600,
-            timeout=1
-        )
-    except IOError as e:
-        print(f"Failed to start GPS loop: {e}")
+        conn = socket.create_connection(address, timeout=5)
+    except OSError as e:
+        print(f"Failed to connect to the uplink: {e}")
         return
 
-    command: int = int(arguments[1])
-    calculated_crc = utils.crc8(bytes([command]))
+    conn.settimeout(None)
+    conn.sendall(f"SEND {int(arguments[0])}\n".encode())
+
+    # Status lines for other commands (or for this one, before its id arrives)
+    # are interleaved with the reply, so remember the latest state of each
+    id = None
+    states: dict[str, tuple[str, str]] = {}
+    final = [state.value for state in FINAL_STATES]
+    for line in conn.makefile("r"):
+        message = line.split()
+        if len(message) == 0:
+            continue
+        elif message[0] == "ERROR":
+            print(f"Command rejected: {' '.join(message[1:])}")
+            break
+        elif message[0] == "ID":
+            id = message[1]
+        elif message[0] == "STATUS" and len(message) == 5:
+            states[message[1]] = (message[3], message[4])
+            if message[1] != id:
+                continue
+
+        if id in states:
+            state, attempts = states[id]
+            print(f"Command {arguments[0]}: {state} ({attempts} attempts)")
+            if state in final:
+                break
 
-    gps_serial.write(bytes([command, calculated_crc, 0x20]))
+    conn.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# A simulated flight computer, for testing the ground station without a
+# rocket. It flies a simple boost, coast, drogue and main profile with a
+# constant wind, and sends each fix as either a text or binary frame, to a
+# serial port or to viewers through a `TelemetryServer`.
+#
+# Usage: python simulate.py --serve 127.0.0.1:5760 --format binary --rate 10
+#        python main.py --source tcp://127.0.0.1:5760
+
+import argparse
+import math
+import time
+from typing import Optional
+
+import serial
+
+## LOCAL IMPORTS ##
+from frames import encode_fix_frame, encode_text_frame
+from packets import GPSFix
+from telemetry import DEFAULT_SERVER_PORT, parse_address
+from telemetry_server import TelemetryServer
+from utils import EARTH_RADIUS_METERS
+###################
+
+GRAVITY = 9.81
+
+
+class FlightSimulator:
+    """A point mass flight with a fixed profile, starting from the pad."""
+
+    def __init__(
+        self,
+        pad: GPSFix,
+        boost_accel: float = 100.0,
+        boost_time: float = 3.0,
+        drogue_rate: float = 25.0,
+        main_rate: float = 6.0,
+        main_altitude: float = 300.0,
+        wind: tuple[float, float] = (5.0, 2.0),
+    ):
+        self.pad = pad
+        self.boost_accel = boost_accel
+        self.boost_time = boost_time
+        self.drogue_rate = drogue_rate
+        self.main_rate = main_rate
+        self.main_altitude = main_altitude
+        self.wind = wind
+        """Wind velocity east and north in m/s"""
+
+        self.time = 0.0
+        self.east = 0.0
+        self.north = 0.0
+        self.height = 0.0
+        self.vertical_speed = 0.0
+        self.apogee_reached = False
+        self.landed = False
+
+    def step(self, dt: float):
+        self.time += dt
+        if self.landed:
+            return
+
+        if self.time <= self.boost_time:
+            self.vertical_speed += (self.boost_accel - GRAVITY) * dt
+        elif not self.apogee_reached:
+            self.vertical_speed -= GRAVITY * dt
+            if self.vertical_speed <= 0:
+                self.apogee_reached = True
+        elif self.height > self.main_altitude:
+            self.vertical_speed = -self.drogue_rate
+        else:
+            self.vertical_speed = -self.main_rate
+
+        self.height += self.vertical_speed * dt
+
+        # The rocket drifts with the wind once it is off the rail
+        if self.height > 10:
+            self.east += self.wind[0] * dt
+            self.north += self.wind[1] * dt
+
+        if self.apogee_reached and self.height <= 0:
+            self.height = 0.0
+            self.vertical_speed = 0.0
+            self.landed = True
+
+    def fix(self) -> GPSFix:
+        latitude = self.pad.latitude + math.degrees(self.north / EARTH_RADIUS_METERS)
+        longitude = self.pad.longitude + math.degrees(
+            self.east / (EARTH_RADIUS_METERS * math.cos(math.radians(self.pad.latitude)))
+        )
+        return GPSFix(latitude, longitude, self.pad.altitude + self.height)
+
+    def time_ms(self) -> int:
+        return round(self.time * 1000)
+
+
+def encode_fix(fix: GPSFix, time_ms: int, binary: bool) -> bytes:
+    if binary:
+        return encode_fix_frame(fix, time_ms)
+    return encode_text_frame(
+        {
+            "time": time_ms,
+            "gps": {
+                "latitude": fix.latitude,
+                "longitude": fix.longitude,
+                "altitude": fix.altitude,
+            },
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated flight computer")
+    parser.add_argument("--port", help="serial port to send frames to")
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const=f"127.0.0.1:{DEFAULT_SERVER_PORT}",
+        metavar="HOST:PORT",
+        help="serve frames to viewers over TCP",
+    )
+    parser.add_argument("--format", choices=["text", "binary"], default="text")
+    parser.add_argument("--rate", type=float, default=10.0, help="fixes per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="time multiplier")
+    parser.add_argument("--pad", type=float, nargs=3, default=[32.940058, -106.921903, 1400.0])
+    arguments = parser.parse_args()
+
+    port: Optional[serial.Serial] = None
+    server: Optional[TelemetryServer] = None
+    if arguments.port is not None:
+        port = serial.Serial(arguments.port, 57600)
+    if arguments.serve is not None:
+        server = TelemetryServer(*parse_address(arguments.serve, DEFAULT_SERVER_PORT))
+        server.start()
+    if port is None and server is None:
+        print("Nowhere to send frames! Need --port and/or --serve")
+        return
+
+    simulator = FlightSimulator(GPSFix(*arguments.pad))
+    dt = 1 / arguments.rate
+    landed_time = None
+
+    try:
+        while landed_time is None or simulator.time - landed_time < 10:
+            simulator.step(dt)
+            frame = encode_fix(
+                simulator.fix(), simulator.time_ms(), arguments.format == "binary"
+            )
+
+            if port is not None:
+                port.write(frame)
+            if server is not None:
+                server.publish(frame)
+
+            if simulator.landed and landed_time is None:
+                landed_time = simulator.time
+                print(f"Landed after {simulator.time:.1f}s")
+
+            time.sleep(dt / arguments.speed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if port is not None:
+            port.close()
+        if server is not None:
+            server.close()
+
+
+if __name__ == "__main__":
+    main()
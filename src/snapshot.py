@@ -0,0 +1,242 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Crash-safe session snapshots, so that `main.py --resume` can pick a flight
+# back up within a second of a crash. The GUI hands over a small `Snapshot`
+# of its state every second, and a writer thread adds the latest fixes from
+# the history and writes it to a temporary file that atomically replaces the
+# previous snapshot, so there is always one complete snapshot on disk.
+#
+# Format, little endian:
+#
+#   "TSNP" <version u16> <written at f64>
+#   <rotator port> <telemetry source>            each a u16 length and UTF-8
+#   <rotator calibrated u8>                      0, 1 or 255 for unknown
+#   <planner state 6 × f64>                      position, velocity and target
+#                                                of the vertical then horizontal
+#                                                axis
+#   <fix count u32> <fixes count × 4 × f64>      as in a `FixHistory`
+#   <crc32 u32>                                  of everything before it
+
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from threading import Condition, Thread
+from typing import Optional
+
+import numpy as np
+
+## LOCAL IMPORTS ##
+from history import FixHistory
+from motion import AxisState, MotionPlanner
+###################
+
+SNAPSHOT_PATH = "session.snapshot"
+PREVIOUS_SUFFIX = ".prev"
+"""The snapshot left by the previous session is kept with this suffix"""
+SNAPSHOT_MAGIC = b"TSNP"
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct("<4sHd")
+PLANNER = struct.Struct("<6d")
+COUNT = struct.Struct("<I")
+CRC = struct.Struct("<I")
+
+UNKNOWN_CALIBRATION = 255
+
+
+class SnapshotError(ValueError):
+    """A snapshot was truncated, corrupted or from an unknown version."""
+
+
+@dataclass
+class Snapshot:
+    rotator_port: str = ""
+    telemetry_source: str = ""
+    rotator_calibrated: Optional[bool] = None
+    planner: tuple[float, ...] = (0.0,) * 6
+    """Position, velocity and target of the vertical then horizontal axis"""
+    fixes: np.ndarray = field(default_factory=lambda: np.empty((0, 4)))
+    written_at: float = 0.0
+    """UNIX time the snapshot was taken"""
+
+
+def planner_state(planner: MotionPlanner) -> tuple[float, ...]:
+    return tuple(
+        value
+        for axis in (planner.vertical, planner.horizontal)
+        for value in (axis.position, axis.velocity, axis.target)
+    )
+
+
+def restore_planner(
+    planner: MotionPlanner, state: tuple[float, ...], targets_only: bool = False
+):
+    """Restore the planner from a snapshot. With `targets_only` the planner
+    keeps its position and velocity, for when it was already reset from where
+    the mount actually is."""
+    for i, name in enumerate(("vertical", "horizontal")):
+        if targets_only:
+            getattr(planner, name).target = state[3 * i + 2]
+            continue
+        axis = AxisState(state[3 * i])
+        axis.velocity = state[3 * i + 1]
+        axis.target = state[3 * i + 2]
+        setattr(planner, name, axis)
+    planner.last_sent = None
+
+
+def pack_string(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return struct.pack("<H", len(encoded)) + encoded
+
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    if snapshot.rotator_calibrated is None:
+        calibrated = UNKNOWN_CALIBRATION
+    else:
+        calibrated = int(snapshot.rotator_calibrated)
+
+    fixes = np.ascontiguousarray(snapshot.fixes, dtype="<f8")
+    body = b"".join(
+        (
+            HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, snapshot.written_at),
+            pack_string(snapshot.rotator_port),
+            pack_string(snapshot.telemetry_source),
+            bytes([calibrated]),
+            PLANNER.pack(*snapshot.planner),
+            COUNT.pack(len(fixes)),
+            fixes.tobytes(),
+        )
+    )
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def decode_snapshot(data: bytes) -> Snapshot:
+    if len(data) < HEADER.size + CRC.size:
+        raise SnapshotError("truncated snapshot")
+
+    body = data[: -CRC.size]
+    if zlib.crc32(body) != CRC.unpack(data[-CRC.size :])[0]:
+        raise SnapshotError("snapshot CRC does not match")
+
+    magic, version, written_at = HEADER.unpack_from(body)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"unknown snapshot version {version}")
+    offset = HEADER.size
+
+    try:
+        strings = []
+        for _ in range(2):
+            (length,) = struct.unpack_from("<H", body, offset)
+            offset += 2
+            strings.append(body[offset : offset + length].decode("utf-8"))
+            offset += length
+
+        calibrated = body[offset]
+        offset += 1
+        planner = PLANNER.unpack_from(body, offset)
+        offset += PLANNER.size
+        (count,) = COUNT.unpack_from(body, offset)
+        offset += COUNT.size
+        fixes = np.frombuffer(body, dtype="<f8", count=count * 4, offset=offset)
+    except (struct.error, IndexError, ValueError, UnicodeDecodeError) as e:
+        raise SnapshotError(f"malformed snapshot: {e}")
+
+    return Snapshot(
+        strings[0],
+        strings[1],
+        None if calibrated == UNKNOWN_CALIBRATION else bool(calibrated),
+        planner,
+        fixes.reshape(count, 4).copy(),
+        written_at,
+    )
+
+
+def write_snapshot(path: str, snapshot: Snapshot):
+    """Replace the snapshot at `path` atomically, so a crash part way through
+    leaves the previous snapshot intact."""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(encode_snapshot(snapshot))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def read_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    try:
+        with open(path, "rb") as file:
+            return decode_snapshot(file.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, SnapshotError) as e:
+        print(f"Could not read snapshot: {e}")
+        return None
+
+
+def read_latest_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    """The snapshot at `path`, or the one kept from the session before it."""
+    snapshot = read_snapshot(path)
+    if snapshot is None:
+        snapshot = read_snapshot(path + PREVIOUS_SUFFIX)
+    return snapshot
+
+
+class SnapshotWriter:
+    """Writes snapshots handed to it on a background thread, adding the most
+    recent fixes from the history."""
+
+    def __init__(
+        self, history: FixHistory, path: str = SNAPSHOT_PATH, fixes: int = 600
+    ):
+        self.history = history
+        self.path = path
+        self.fixes = fixes
+        """Number of recent fixes to keep in every snapshot"""
+
+        self.condition = Condition()
+        self.pending: Optional[Snapshot] = None
+        self.stopped = False
+        self.written = False
+        """Whether this session has written a snapshot yet"""
+        self.thread = Thread(target=self.run, name="snapshot_writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def submit(self, snapshot: Snapshot):
+        """Queue a snapshot to be written, replacing any that is still waiting."""
+        with self.condition:
+            self.pending = snapshot
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                snapshot, self.pending = self.pending, None
+            if snapshot is None:
+                continue
+
+            snapshot.fixes = self.history.last(self.fixes)
+            snapshot.written_at = time.time()
+            try:
+                # Keep the last session's snapshot in case this session was
+                # started without resuming from it
+                if not self.written and os.path.exists(self.path):
+                    os.replace(self.path, self.path + PREVIOUS_SUFFIX)
+                write_snapshot(self.path, snapshot)
+                self.written = True
+            except OSError as e:
+                print(f"Failed to write snapshot: {e}")
@@ -0,0 +1,181 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Sources of telemetry frames. The RFD serial port is the primary source, but
+# only one process can hold it, so other viewers can consume the same verified
+# frames republished by a `TelemetryServer` over TCP or UDP multicast instead.
+
+import socket
+import struct
+import time
+from typing import Optional
+
+import serial
+
+DEFAULT_SERVER_PORT = 5760
+DEFAULT_MULTICAST_GROUP = "239.255.76.67"
+DEFAULT_MULTICAST_PORT = 5761
+
+
+class TelemetrySource:
+    """A stream of telemetry frames, which are either newline terminated lines
+    or binary frames."""
+
+    name = "unknown"
+
+    def read(self, size: int) -> bytes:
+        """Read up to `size` bytes, returning fewer if the timeout expired."""
+        raise NotImplementedError
+
+    def readline(self) -> bytes:
+        """Read a single line, returning a partial line (or nothing) if the
+        timeout expired."""
+        raise NotImplementedError
+
+    def write(self, data: bytes):
+        """Send data back over the link, such as an uplink command."""
+        raise OSError(f"Cannot send commands over {self.name}")
+
+    def close(self):
+        """Release the underlying device or connection."""
+
+
+class SerialSource(TelemetrySource):
+    """Telemetry read directly from the RFD serial port."""
+
+    def __init__(self, port: str, baud: int = 57600):
+        self.name = port
+        self.port = serial.Serial(port, baud, timeout=1)
+
+    def read(self, size: int) -> bytes:
+        return self.port.read(size)
+
+    def readline(self) -> bytes:
+        return self.port.readline()
+
+    def write(self, data: bytes):
+        self.port.write(data)
+
+    def close(self):
+        self.port.close()
+
+
+class BufferedSource(TelemetrySource):
+    """A source that receives data in chunks, such as a socket."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def fill(self) -> bool:
+        """Receive more data into the buffer. Returns `False` if nothing
+        arrived within the timeout."""
+        raise NotImplementedError
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) < size:
+            if not self.fill():
+                break
+
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self) -> bytes:
+        while (end := self.buffer.find(b"\n")) == -1:
+            if not self.fill():
+                end = len(self.buffer) - 1
+                break
+
+        line = bytes(self.buffer[: end + 1])
+        del self.buffer[: end + 1]
+        return line
+
+
+class NetworkSource(BufferedSource):
+    """Telemetry republished by a `TelemetryServer` over TCP. The connection is
+    re-established automatically if the server goes away."""
+
+    def __init__(self, host: str, port: int = DEFAULT_SERVER_PORT):
+        super().__init__()
+        self.name = f"tcp://{host}:{port}"
+        self.address = (host, port)
+        self.sock: Optional[socket.socket] = None
+        self.connect()
+
+    def connect(self):
+        self.sock = socket.create_connection(self.address, timeout=1)
+        self.buffer.clear()
+
+    def fill(self) -> bool:
+        if self.sock is None:
+            # Back off a little so a dead server does not spin the reader
+            time.sleep(1)
+            try:
+                self.connect()
+            except OSError:
+                return False
+
+        try:
+            chunk = self.sock.recv(4096)  # type: ignore
+        except TimeoutError:
+            return False
+
+        if len(chunk) == 0:
+            self.sock.close()  # type: ignore
+            self.sock = None
+            raise ConnectionError("Telemetry server closed the connection")
+
+        self.buffer += chunk
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class MulticastSource(BufferedSource):
+    """Telemetry republished by a `TelemetryServer` over UDP multicast, one
+    frame per datagram."""
+
+    def __init__(
+        self, group: str = DEFAULT_MULTICAST_GROUP, port: int = DEFAULT_MULTICAST_PORT
+    ):
+        super().__init__()
+        self.name = f"udp://{group}:{port}"
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("", port))
+
+        membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton("0.0.0.0"))
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        self.sock.settimeout(1)
+
+    def fill(self) -> bool:
+        try:
+            self.buffer += self.sock.recv(65535)
+        except TimeoutError:
+            return False
+        return True
+
+    def close(self):
+        self.sock.close()
+
+
+def parse_address(address: str, default_port: int) -> tuple[str, int]:
+    """Split a `host:port` string, using `default_port` if none is given."""
+    host, _, port = address.rpartition(":")
+    if host == "":
+        return (port, default_port)
+    return (host, int(port))
+
+
+def open_source(spec: str) -> TelemetrySource:
+    """Open a telemetry source from a specification, which is either a serial
+    port name, `tcp://host:port` or `udp://group:port`."""
+    if spec.startswith("tcp://"):
+        return NetworkSource(*parse_address(spec[6:], DEFAULT_SERVER_PORT))
+    elif spec.startswith("udp://"):
+        return MulticastSource(*parse_address(spec[6:], DEFAULT_MULTICAST_PORT))
+    else:
+        return SerialSource(spec)
@@ -0,0 +1,144 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Local fan-out of verified telemetry lines, so that more than one process can
+# watch a flight while only one of them holds the RFD serial port. Every TCP
+# client gets its own bounded queue and writer thread, so a slow consumer only
+# ever loses its own oldest lines and never stalls the reader.
+
+import socket
+from collections import deque
+from threading import Condition, Event, Lock, Thread
+from typing import Optional
+
+## LOCAL IMPORTS ##
+from telemetry import DEFAULT_SERVER_PORT
+###################
+
+
+class TelemetryClient:
+    """A single connected TCP client and its queue of pending lines."""
+
+    def __init__(self, conn: socket.socket, address, queue_size: int):
+        self.conn = conn
+        self.address = address
+        self.queue: deque[bytes] = deque(maxlen=queue_size)
+        self.condition = Condition()
+        self.closed = False
+        self.dropped = 0
+        """Number of lines dropped because the client could not keep up"""
+
+        self.thread = Thread(
+            target=self.run, name=f"telemetry_client_{address[1]}", daemon=True
+        )
+
+    def put(self, line: bytes):
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(line)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while len(self.queue) == 0 and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    break
+                line = self.queue.popleft()
+
+            try:
+                self.conn.sendall(line)
+            except OSError:
+                break
+
+        self.close()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.conn.close()
+
+
+class TelemetryServer:
+    """Publishes verified telemetry lines to local viewers over TCP and,
+    optionally, UDP multicast."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_SERVER_PORT,
+        multicast: Optional[tuple[str, int]] = None,
+        queue_size: int = 256,
+    ):
+        self.queue_size = queue_size
+        self.clients: list[TelemetryClient] = []
+        self.clients_lock = Lock()
+        self.stop_event = Event()
+
+        self.listener = socket.create_server((host, port))
+        self.listener.settimeout(0.5)
+        self.address = self.listener.getsockname()
+
+        self.multicast = multicast
+        self.multicast_sock = None
+        if multicast is not None:
+            self.multicast_sock = socket.socket(
+                socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
+            )
+            self.multicast_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            self.multicast_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            self.multicast_sock.setblocking(False)
+
+        self.thread = Thread(target=self.accept_loop, name="telemetry_server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        print(f"Serving telemetry on tcp://{self.address[0]}:{self.address[1]}")
+        if self.multicast is not None:
+            print(f"Serving telemetry on udp://{self.multicast[0]}:{self.multicast[1]}")
+
+    def accept_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                conn, address = self.listener.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                break
+
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = TelemetryClient(conn, address, self.queue_size)
+            with self.clients_lock:
+                self.clients.append(client)
+            client.thread.start()
+            print(f"Telemetry client connected from {address[0]}:{address[1]}")
+
+    def publish(self, line: bytes):
+        """Queue a line for every connected client. This never blocks on the
+        network, so it is safe to call from the telemetry reader."""
+        with self.clients_lock:
+            # Forget about clients whose connection has gone away
+            self.clients = [c for c in self.clients if not c.closed]
+            clients = list(self.clients)
+
+        for client in clients:
+            client.put(line)
+
+        if self.multicast_sock is not None:
+            try:
+                self.multicast_sock.sendto(line, self.multicast)  # type: ignore
+            except OSError:
+                pass
+
+    def close(self):
+        self.stop_event.set()
+        self.listener.close()
+        with self.clients_lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+        if self.multicast_sock is not None:
+            self.multicast_sock.close()
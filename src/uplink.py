@@ -0,0 +1,381 @@
+## 2025, UNL Aerospace Club
+## Licensed under the GNU General Public License version 3
+#
+# Uplink commands to the flight computer. Commands go out over the same open
+# telemetry source the reader is using, one at a time from a queue, and each is
+# resent until the flight computer acknowledges it (the `ack` field of a
+# telemetry packet, or an ack frame) or it runs out of attempts.
+#
+# By default commands use the flight computer's existing `<cmd> <crc> 0x20`
+# frame and acknowledgements are matched by value, which cannot tell a late
+# acknowledgement of an earlier command with the same value apart. Once the
+# firmware supports it, `sequenced` sends a binary command frame with a
+# sequence number instead, and only acknowledgements echoing it (`ack_seq`)
+# count.
+#
+# The uplink lives wherever the reader does, so other programs such as `send_command.py`
+# and the uplink panel submit commands and watch their status over a local
+# socket with a simple line protocol:
+#
+#   SEND <value>                             queue a command
+#   ID <id> | ERROR <message>                reply to SEND
+#   STATUS <id> <value> <state> <attempts>   sent to every client on changes
+
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from threading import Condition, Event, Lock, Thread
+from typing import Callable, Optional
+
+## LOCAL IMPORTS ##
+from frames import encode_command_frame
+from telemetry import TelemetrySource
+###################
+
+DEFAULT_UPLINK_PORT = 5762
+
+
+class CommandState(Enum):
+    QUEUED = "queued"
+    SENT = "sent"
+    ACKED = "acked"
+    FAILED = "failed"
+
+
+FINAL_STATES = (CommandState.ACKED, CommandState.FAILED)
+
+
+@dataclass(slots=True)
+class UplinkCommand:
+    id: int
+    value: int
+    state: CommandState = CommandState.QUEUED
+    attempts: int = 0
+
+    @property
+    def seq(self) -> int:
+        """Sequence number sent with the command, the id wrapped to a byte"""
+        return self.id & 0xFF
+
+    def status_line(self) -> bytes:
+        return f"STATUS {self.id} {self.value} {self.state.value} {self.attempts}\n".encode()
+
+
+class Uplink:
+    """Sends queued commands over the attached telemetry source and tracks
+    their acknowledgements."""
+
+    def __init__(
+        self,
+        timeout: float = 2.0,
+        max_attempts: int = 3,
+        history: int = 50,
+        sequenced: bool = False,
+    ):
+        self.timeout = timeout
+        """Seconds to wait for an acknowledgement before resending"""
+        self.max_attempts = max_attempts
+        self.sequenced = sequenced
+        """Send sequence numbers and require them in acknowledgements, which
+        needs firmware support"""
+
+        self.condition = Condition()
+        self.queue: deque[UplinkCommand] = deque()
+        self.recent: deque[UplinkCommand] = deque(maxlen=history)
+        """Recent commands in the order they were submitted, for display"""
+        self.pending: Optional[UplinkCommand] = None
+        self.source: Optional[TelemetrySource] = None
+        self.next_id = 1
+        self.stopped = False
+
+        self.listeners: list[Callable[[UplinkCommand], None]] = []
+        """Called with a command every time its state changes"""
+
+        self.thread = Thread(target=self.run, name="uplink", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def attach(self, source: TelemetrySource):
+        """Send commands over `source`, which the telemetry reader has open."""
+        with self.condition:
+            self.source = source
+            self.condition.notify_all()
+
+    def detach(self, source: TelemetrySource):
+        """Stop using `source`, unless another reader has since attached."""
+        with self.condition:
+            if self.source is source:
+                self.source = None
+
+    def submit(self, value: int) -> UplinkCommand:
+        if not 0 <= value <= 255:
+            raise ValueError(f"command {value} does not fit in a byte")
+
+        with self.condition:
+            command = UplinkCommand(self.next_id, value)
+            self.next_id += 1
+            self.queue.append(command)
+            self.recent.append(command)
+            self.condition.notify_all()
+
+        self.notify(command)
+        return command
+
+    def acknowledge(self, value: int, seq: Optional[int]):
+        """Called by the telemetry reader for every acknowledgement received.
+        When sequenced, the sequence number has to match as well as the
+        value."""
+        with self.condition:
+            command = self.pending
+            if (
+                command is not None
+                and command.state == CommandState.SENT
+                and command.value == value
+                and (not self.sequenced or command.seq == seq)
+            ):
+                command.state = CommandState.ACKED
+                self.condition.notify_all()
+
+    def notify(self, command: UplinkCommand):
+        for listener in self.listeners:
+            try:
+                listener(command)
+            except Exception as e:
+                print(f"Uplink listener failed: {e}")
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopped and (len(self.queue) == 0 or self.source is None):
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                command = self.queue.popleft()
+                self.pending = command
+
+            self.send(command)
+
+            with self.condition:
+                self.pending = None
+
+    def send(self, command: UplinkCommand):
+        while command.attempts < self.max_attempts:
+            with self.condition:
+                source = self.source
+            if source is None:
+                break
+
+            # Marked sent before writing, as the acknowledgement can arrive
+            # before the write returns
+            with self.condition:
+                command.attempts += 1
+                command.state = CommandState.SENT
+            try:
+                source.write(
+                    encode_command_frame(
+                        command.value, command.seq if self.sequenced else None
+                    )
+                )
+            except OSError as e:
+                print(f"Failed to send command {command.value}: {e}")
+                break
+            self.notify(command)
+
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: command.state == CommandState.ACKED or self.stopped,
+                    self.timeout,
+                )
+                if command.state == CommandState.ACKED or self.stopped:
+                    break
+
+        with self.condition:
+            if command.state != CommandState.ACKED:
+                command.state = CommandState.FAILED
+        self.notify(command)
+
+
+class UplinkConnection:
+    """A single local client of the `UplinkServer`."""
+
+    def __init__(self, conn: socket.socket, uplink: Uplink):
+        self.conn = conn
+        self.uplink = uplink
+        self.lock = Lock()
+        self.closed = False
+
+    def send(self, line: bytes):
+        with self.lock:
+            if self.closed:
+                return
+            try:
+                self.conn.sendall(line)
+            except OSError:
+                self.closed = True
+
+    def run(self):
+        with self.uplink.condition:
+            recent = list(self.uplink.recent)
+        for command in recent:
+            self.send(command.status_line())
+
+        try:
+            for line in self.conn.makefile("rb"):
+                self.handle(line.decode("utf-8", "replace").split())
+        except OSError:
+            pass
+
+        self.close()
+
+    def handle(self, request: list[str]):
+        if len(request) != 2 or request[0] != "SEND":
+            self.send(b"ERROR unknown request\n")
+            return
+
+        try:
+            command = self.uplink.submit(int(request[1]))
+        except ValueError as e:
+            self.send(f"ERROR {e}\n".encode())
+            return
+        self.send(f"ID {command.id}\n".encode())
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.conn.close()
+
+
+class UplinkServer:
+    """Accepts commands for an `Uplink` from local programs, and tells them
+    what happened to every command."""
+
+    def __init__(
+        self, uplink: Uplink, host: str = "127.0.0.1", port: int = DEFAULT_UPLINK_PORT
+    ):
+        self.uplink = uplink
+        self.connections: list[UplinkConnection] = []
+        self.connections_lock = Lock()
+        self.stop_event = Event()
+
+        self.listener = socket.create_server((host, port))
+        self.listener.settimeout(0.5)
+        self.address = self.listener.getsockname()
+
+        uplink.listeners.append(self.broadcast)
+        self.thread = Thread(target=self.accept_loop, name="uplink_server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        print(f"Accepting uplink commands on {self.address[0]}:{self.address[1]}")
+
+    def accept_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                conn, _ = self.listener.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                break
+
+            connection = UplinkConnection(conn, self.uplink)
+            with self.connections_lock:
+                self.connections = [c for c in self.connections if not c.closed]
+                self.connections.append(connection)
+            Thread(target=connection.run, name="uplink_connection", daemon=True).start()
+
+    def broadcast(self, command: UplinkCommand):
+        line = command.status_line()
+        with self.connections_lock:
+            connections = list(self.connections)
+        for connection in connections:
+            connection.send(line)
+
+    def close(self):
+        self.uplink.listeners.remove(self.broadcast)
+        self.stop_event.set()
+        self.listener.close()
+        with self.connections_lock:
+            for connection in self.connections:
+                connection.close()
+            self.connections = []
+
+
+class UplinkClient:
+    """Submits commands to an `UplinkServer` and keeps track of the status of
+    every command it hears about, reconnecting if the server goes away."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_UPLINK_PORT):
+        self.address = (host, port)
+        self.sock: Optional[socket.socket] = None
+        self.lock = Lock()
+        self.closed = False
+        self.commands: dict[int, tuple[int, str, int]] = {}
+        """Value, state and attempts of every known command by id"""
+        self.replies: deque[str] = deque()
+        """Replies to SEND requests, in order"""
+        self.changed = True
+
+        self.thread = Thread(target=self.run, name="uplink_client", daemon=True)
+
+    @property
+    def connected(self) -> bool:
+        return self.sock is not None
+
+    def start(self):
+        self.thread.start()
+
+    def send(self, value: int):
+        with self.lock:
+            if self.sock is None:
+                raise ConnectionError("Not connected to the uplink")
+            self.sock.sendall(f"SEND {value}\n".encode())
+
+    def run(self):
+        while not self.closed:
+            try:
+                sock = socket.create_connection(self.address, timeout=1)
+            except OSError:
+                time.sleep(1)
+                continue
+
+            sock.settimeout(None)
+            with self.lock:
+                self.sock = sock
+            self.changed = True
+
+            try:
+                for line in sock.makefile("rb"):
+                    self.handle(line.decode("utf-8", "replace").split())
+            except OSError:
+                pass
+
+            with self.lock:
+                self.sock = None
+            self.changed = True
+            sock.close()
+
+    def handle(self, message: list[str]):
+        if len(message) == 5 and message[0] == "STATUS":
+            id, value, state, attempts = message[1:]
+            self.commands[int(id)] = (int(value), state, int(attempts))
+            self.changed = True
+        elif len(message) > 0 and message[0] in ("ID", "ERROR"):
+            self.replies.append(" ".join(message))
+            self.changed = True
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            if self.sock is not None:
+                try:
+                    self.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
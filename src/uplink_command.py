@@ -0,0 +1,84 @@
+from typing import Optional
+import customtkinter
+
+
+## LOCAL IMPORTS ##
+from uplink import UplinkClient
+###################
+
+
+class UplinkCommandWindow(customtkinter.CTkToplevel):
+    """Sends uplink commands through the tracker's uplink and shows whether
+    the flight computer acknowledged them."""
+
+    def __init__(self, address: Optional[tuple[str, int]] = None):
+        super().__init__()
+
+        self.title("Uplink Commands")
+
+        self.client = UplinkClient(*address) if address is not None else UplinkClient()
+        self.client.start()
+
+        self.connection_label = customtkinter.CTkLabel(self, text="Connecting…")
+        self.connection_label.grid(row=0, column=0, columnspan=2, pady=(10, 5))
+
+        self.command_entry = customtkinter.CTkEntry(
+            self, placeholder_text="Command value", width=150
+        )
+        self.command_entry.grid(row=1, column=0, padx=10, pady=5)
+        self.command_entry.bind("<Return>", lambda _: self.send())
+        customtkinter.CTkButton(
+            self, text="Send", width=80, command=self.send
+        ).grid(row=1, column=1, padx=10, pady=5)
+
+        self.reply_label = customtkinter.CTkLabel(self, text="")
+        self.reply_label.grid(row=2, column=0, columnspan=2)
+
+        self.status_box = customtkinter.CTkTextbox(self, width=300, height=200)
+        self.status_box.grid(row=3, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
+        self.status_box.configure(state="disabled")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.after(250, self.refresh)
+
+    def send(self):
+        try:
+            self.client.send(int(self.command_entry.get()))
+        except ValueError:
+            self.reply_label.configure(text="Command must be a number")
+            return
+        except OSError as e:
+            self.reply_label.configure(text=f"Failed to send: {e}")
+            return
+
+        self.command_entry.delete(0, "end")
+
+    def refresh(self):
+        # Only redraw when the client heard something new
+        if self.client.changed:
+            self.client.changed = False
+
+            if self.client.connected:
+                self.connection_label.configure(text="Connected to uplink")
+            else:
+                self.connection_label.configure(text="Uplink not running")
+
+            while len(self.client.replies) > 0:
+                self.reply_label.configure(text=self.client.replies.popleft())
+
+            lines = [
+                f"#{id:<4} {value:>3}  {state:<7} {attempts} attempt(s)"
+                for id, (value, state, attempts) in sorted(
+                    self.client.commands.items(), reverse=True
+                )
+            ]
+            self.status_box.configure(state="normal")
+            self.status_box.delete("1.0", "end")
+            self.status_box.insert("1.0", "\n".join(lines))
+            self.status_box.configure(state="disabled")
+
+        self.after(250, self.refresh)
+
+    def on_closing(self):
+        self.client.close()
+        self.destroy()
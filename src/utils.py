@@ -1,13 +1,33 @@
 ## See `main.py` for more information
 
+import functools
 import math
 from typing import Optional, Self
 from pygeomag import GeoMag
 import datetime
+import numpy as np
 
 EARTH_RADIUS_METERS = 6_378_137
 
 
+@functools.lru_cache(maxsize=16)
+def magnetic_declination(
+    latitude: float, longitude: float, altitude: float, date: datetime.date
+) -> float:
+    """Magnetic declination in degrees at a point on a day. Building the
+    high resolution model is slow, and the ground station rarely moves, so
+    results are cached."""
+    fractional_year = (
+        float((date - datetime.date(date.year, 1, 1)).days) / 365.2425
+    ) + date.year
+
+    geo_mag = GeoMag(base_year=datetime.datetime.now(), high_resolution=True)
+    result = geo_mag.calculate(
+        glat=latitude, glon=longitude, alt=altitude, time=fractional_year
+    )
+    return result.d
+
+
 class GPSPoint:
     """A single point on the Earth, including altitude."""
 
@@ -77,24 +97,10 @@ class GPSPoint:
         """Find the absolute bearing (azimuth) to another point, to be used with a device basing its heading on magnetic north"""
 
         bearing = self.bearing_to(other, False)
-
-        current_datetime = datetime.datetime.now()
-        fractional_year = (
-            float(
-                (
-                    current_datetime.date() - datetime.date(current_datetime.year, 1, 1)
-                ).days
-            )
-            / 365.2425
-        ) + current_datetime.year
-
-        geo_mag = GeoMag(base_year=datetime.datetime.now(), high_resolution=True)
-        result = geo_mag.calculate(
-            glat=self.lat, glon=self.lon, alt=self.alt or 0.0, time=fractional_year
+        bearing = bearing + magnetic_declination(
+            self.lat, self.lon, self.alt or 0.0, datetime.date.today()
         )
 
-        bearing = bearing + result.d
-
         if positive:
             bearing = (bearing + 360) % 360
 
@@ -122,6 +128,24 @@ class GPSPoint:
         return vertical_angle
 
 
+def ground_distances(
+    lat: float, lon: float, lats: np.ndarray, lons: np.ndarray
+) -> np.ndarray:
+    """Great-circle ground-only distances in meters from one point to arrays
+    of points, all in degrees."""
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(lats)
+
+    a = (
+        np.sin((lats_rad - lat_rad) / 2) ** 2
+        + math.cos(lat_rad)
+        * np.cos(lats_rad)
+        * np.sin(np.radians(lons - lon) / 2) ** 2
+    )
+
+    return EARTH_RADIUS_METERS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
 def m_to_ft(meters: float) -> float:
     """Helper function to convert meters to feet, mainly for display"""
     return meters / 0.3048